@@ -4,8 +4,11 @@ Deployment script for Sensa ADK Agents to Google Cloud Functions
 """
 
 import os
+import shlex
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def run_command(command, description=""):
@@ -22,6 +25,44 @@ def run_command(command, description=""):
             print(f"Error output: {e.stderr}")
         return False
 
+def run_commands_parallel(commands):
+    """Run independent commands concurrently; commands is a list of (command, description)"""
+    def run(command, description):
+        # Join shell line continuations, and resolve the executable so gcloud.cmd is found on Windows
+        args = shlex.split(command.replace('\\\n', ' '))
+        args[0] = shutil.which(args[0]) or args[0]
+        try:
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        except OSError as e:
+            return description or command, None, '', str(e)
+        stdout, stderr = proc.communicate()
+        return description or command, proc.returncode, stdout, stderr
+    
+    if not commands:
+        return True
+    
+    for command, description in commands:
+        print(f"Running: {description or command}")
+    
+    with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+        results = list(executor.map(lambda cmd: run(*cmd), commands))
+    
+    success = True
+    for description, returncode, stdout, stderr in results:
+        if returncode == 0:
+            print(f"Finished: {description}")
+            if stdout:
+                print(stdout)
+        else:
+            success = False
+            if returncode is None:
+                print(f"Error: {description} could not be started")
+            else:
+                print(f"Error: {description} failed with exit code {returncode}")
+            if stderr:
+                print(f"Error output: {stderr}")
+    return success
+
 def check_requirements():
     """Check if required tools are installed"""
     print("Checking requirements...")
@@ -56,7 +97,7 @@ def deploy_to_cloud_functions():
     
     print("Deploying Sensa Agents to Google Cloud Functions...")
     
-    # Deploy main agent handler
+    # Each function deploys independently, so run them concurrently
     deploy_cmd = """
     gcloud functions deploy sensa-agents \
         --runtime python312 \
@@ -69,10 +110,19 @@ def deploy_to_cloud_functions():
         --set-env-vars FUNCTION_TARGET=sensa_agents_handler
     """
     
-    if not run_command(deploy_cmd, "Deploying main agent function"):
-        return False
+    stream_deploy_cmd = """
+    gcloud functions deploy sensa-agents-stream \
+        --gen2 \
+        --runtime python312 \
+        --trigger-http \
+        --allow-unauthenticated \
+        --source . \
+        --entry-point sensa_agents_stream_handler \
+        --memory 512MB \
+        --timeout 540s \
+        --set-env-vars FUNCTION_TARGET=sensa_agents_stream_handler
+    """
     
-    # Deploy health check function
     health_deploy_cmd = """
     gcloud functions deploy sensa-agents-health \
         --runtime python312 \
@@ -85,7 +135,11 @@ def deploy_to_cloud_functions():
         --set-env-vars FUNCTION_TARGET=health_check
     """
     
-    if not run_command(health_deploy_cmd, "Deploying health check function"):
+    if not run_commands_parallel([
+        (deploy_cmd, "Deploying main agent function"),
+        (stream_deploy_cmd, "Deploying streaming agent function"),
+        (health_deploy_cmd, "Deploying health check function"),
+    ]):
         return False
     
     print("\n✅ Deployment successful!")
@@ -103,10 +157,10 @@ def create_main_py():
     """Create main.py for Cloud Functions deployment"""
     main_py_content = """
 # Cloud Functions entry point
-from src.main import sensa_agents_handler, health_check
+from src.main import sensa_agents_handler, sensa_agents_stream_handler, health_check
 
 # Export the handlers for Cloud Functions
-__all__ = ['sensa_agents_handler', 'health_check']
+__all__ = ['sensa_agents_handler', 'sensa_agents_stream_handler', 'health_check']
 """
     
     with open("main.py", "w") as f:
@@ -1,38 +1,48 @@
-import json
 import os
-import requests
-from typing import Dict, Any, List
-from datetime import datetime
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Tuple
 
 # AWS and third-party imports
-import boto3
+import orjson
 from supabase import create_client, Client
-import networkx as nx
-# import pygraphviz as pgv  # Optional dependency for advanced layouts
 import google.generativeai as genai
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.idempotency import (
     IdempotencyConfig, 
-    idempotent,
+    idempotent_function,
     DynamoDBPersistenceLayer
 )
-from aws_lambda_powertools.utilities.idempotency.exceptions import IdempotencyAlreadyInProgressError
+from aws_lambda_powertools.utilities.idempotency.exceptions import (
+    IdempotencyAlreadyInProgressError,
+    IdempotencyKeyError
+)
 
 # Exception imports for specific error handling
+from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 from google.api_core.exceptions import GoogleAPICallError
 try:
     from supabase.client import APIError as SupabaseAPIError
 except ImportError:
-    # Fallback for different supabase versions
-    SupabaseAPIError = Exception
+    # supabase v2 re-exports postgrest's error; a bare Exception fallback would
+    # shadow the Google/AWS handlers that follow it in process_record
+    from postgrest.exceptions import APIError as SupabaseAPIError
 
 # Initialize logger
 logger = Logger()
 
-# Initialize AWS clients
-secrets_client = boto3.client('secretsmanager')
-sqs_client = boto3.client('sqs')
+# AWS clients are created on first use; keep-alive pooled connections are reused across warm invocations
+_boto_config = BotoConfig(tcp_keepalive=True, max_pool_connections=4)
+
+@lru_cache(maxsize=None)
+def get_aws_client(service_name: str):
+    """Create (once per container) a boto3 client for the given service."""
+    import boto3
+    return boto3.client(service_name, config=_boto_config)
 
 # Initialize idempotency configuration
 persistence_layer = DynamoDBPersistenceLayer(
@@ -45,27 +55,39 @@ persistence_layer = DynamoDBPersistenceLayer(
 )
 
 idempotency_config = IdempotencyConfig(
-    event_key_jmespath='Records[0].body',
-    payload_validation_jmespath='jobId',
-    raise_on_no_idempotency_key=False,
-    expires_after_seconds=3600,  # 1 hour TTL
-    use_local_cache=True,
+    event_key_jmespath='body',  # keyed per SQS record on its message body
+    raise_on_no_idempotency_key=True,  # Fail fast on malformed SQS events instead of skipping dedup
+    expires_after_seconds=900,  # 15 minutes; retries of the same job cluster well inside this window
+    use_local_cache=True,  # Warm-container duplicates are answered without a DynamoDB read
     local_cache_max_items=1000,
-    hash_function='md5'
+    hash_function='sha256'  # Dedup key only; SHA-256 is hardware-accelerated on Graviton and modern x86
 )
 
-# Cache for secrets to avoid repeated API calls
-_secrets_cache = {}
+# Emit the intermediate 'processing' job status (one extra Supabase write per job)
+EMIT_PROCESSING_STATUS = os.environ.get('EMIT_PROCESSING_STATUS', 'false').lower() == 'true'
+
+# Maximum SQS records processed concurrently per invocation; keep in sync with the SQS BatchSize
+# in template.yaml and infrastructure/template.yaml so no record waits for a free worker
+RECORD_WORKERS = int(os.environ.get('RECORD_WORKERS', '4'))
+
+# Upper bound on the Gemini response size accepted for parsing
+MAX_RESPONSE_BYTES = int(os.environ.get('MAX_RESPONSE_BYTES', str(512 * 1024)))
+
+# Cache for secrets to avoid repeated API calls; entries are (fetched_at, value)
+# and are refreshed after SECRET_CACHE_TTL seconds so rotated secrets are picked up
+SECRET_CACHE_TTL = float(os.environ.get('SECRET_CACHE_TTL', '600'))
+_secrets_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
 
 def get_secret(secret_name: str) -> Dict[str, Any]:
-    """Retrieve secret from AWS Secrets Manager with caching."""
-    if secret_name in _secrets_cache:
-        return _secrets_cache[secret_name]
+    """Retrieve secret from AWS Secrets Manager with TTL caching."""
+    entry = _secrets_cache.get(secret_name)
+    if entry and time.monotonic() - entry[0] < SECRET_CACHE_TTL:
+        return entry[1]
     
     try:
-        response = secrets_client.get_secret_value(SecretId=secret_name)
-        secret_value = json.loads(response['SecretString'])
-        _secrets_cache[secret_name] = secret_value
+        response = get_aws_client('secretsmanager').get_secret_value(SecretId=secret_name)
+        secret_value = orjson.loads(response['SecretString'])
+        _secrets_cache[secret_name] = (time.monotonic(), secret_value)
         return secret_value
     except ClientError as e:
         logger.error(f"Failed to retrieve secret {secret_name}: {e}")
@@ -121,18 +143,20 @@ def initialize_clients():
             logger.error(f"Failed to initialize Google AI client: {e}")
             raise
 
-def generate_mindmap_prompt(subject: str) -> str:
-    """
-    Generate a structured prompt for the AI to create mindmap data.
-    Uses advanced prompt engineering with strict JSON schema enforcement.
-    
-    Args:
-        subject: The topic for the mindmap
-        
-    Returns:
-        Formatted prompt string optimized for schema-constrained generation
-    """
-    return f"""You are a helpful assistant that specializes in knowledge structuring and graph theory. Your task is to analyze the provided subject and generate a hierarchical mind map structure.
+# Build clients during the Lambda init phase so warm invocations skip the setup.
+# If credentials are unavailable at import, handlers retry lazily via ensure_clients().
+try:
+    initialize_clients()
+except Exception:
+    logger.warning("Client initialization deferred to first invocation")
+
+def ensure_clients():
+    """Initialize clients on demand if import-time initialization did not complete."""
+    if supabase_client is None or genai_client is None:
+        initialize_clients()
+
+# Static prompt text is built once at import; only the subject is substituted per job
+_MINDMAP_PROMPT_TMPL = """You are a helpful assistant that specializes in knowledge structuring and graph theory. Your task is to analyze the provided subject and generate a hierarchical mind map structure.
 
 The output must be a single, valid JSON object that strictly conforms to the following Pydantic schema definition. Do not include any explanatory text, markdown formatting, or any content outside of the JSON object itself.
 
@@ -191,6 +215,80 @@ Subject to Analyze: {subject}
 
 JSON Output:"""
 
+# Split around the subject once so each prompt is two concatenations, with no format-string parsing per job
+_MINDMAP_PROMPT_HEAD, _, _MINDMAP_PROMPT_TAIL = _MINDMAP_PROMPT_TMPL.format(subject='{subject}').partition('{subject}')
+
+# Response schema enforced by Gemini; built once at import rather than per job
+_MINDMAP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "nodes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {
+                        "type": "string",
+                        "description": "A unique identifier for the node, should be a concise, URL-friendly slug."
+                    },
+                    "label": {
+                        "type": "string",
+                        "description": "The human-readable title of the concept."
+                    },
+                    "description": {
+                        "type": "string",
+                        "description": "A brief, one-sentence explanation of the concept."
+                    }
+                },
+                "required": ["id", "label", "description"]
+            }
+        },
+        "edges": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "source": {
+                        "type": "string",
+                        "description": "The 'id' of the source node."
+                    },
+                    "target": {
+                        "type": "string",
+                        "description": "The 'id' of the target node."
+                    },
+                    "label": {
+                        "type": "string",
+                        "description": "Optional label for the relationship."
+                    }
+                },
+                "required": ["source", "target"]
+            }
+        }
+    },
+    "required": ["nodes", "edges"]
+}
+
+# Required fields of each node and edge, fetched in one C-level call per item
+_NODE_FIELDS = itemgetter('id', 'label', 'description')
+_EDGE_ENDS = itemgetter('source', 'target')
+
+def generate_mindmap_prompt(subject: str) -> str:
+    """
+    Generate a structured prompt for the AI to create mindmap data.
+    Uses advanced prompt engineering with strict JSON schema enforcement.
+    
+    Args:
+        subject: The topic for the mindmap
+        
+    Returns:
+        Formatted prompt string optimized for schema-constrained generation
+    """
+    return _MINDMAP_PROMPT_HEAD + str(subject) + _MINDMAP_PROMPT_TAIL
+
+def _utc_timestamp() -> str:
+    """ISO-8601 UTC timestamp at second precision, formatted entirely in C."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
 def update_job_status(job_id: str, status: str, result_data: Dict = None, error_message: str = None):
     """
     Update job status using epistemic_driver_history table as a fallback.
@@ -213,7 +311,8 @@ def update_job_status(job_id: str, status: str, result_data: Dict = None, error_
                     'job_id': job_id,
                     'status': status,
                     'mindmap_data': result_data,
-                    'generated_at': datetime.utcnow().isoformat()
+                    # Reuse the generation timestamp rather than formatting a new one
+                    'generated_at': result_data.get('metadata', {}).get('generated_at') or _utc_timestamp()
                 },
                 'tags': ['aws-generated', 'mindmap', status],
                 'notes': error_message if error_message else f"Generated via AWS Lambda - Job ID: {job_id}"
@@ -243,6 +342,46 @@ def update_job_status(job_id: str, status: str, result_data: Dict = None, error_
             'error': str(e)
         })
 
+# Spacing between sibling leaves and between levels in the hierarchical layout
+NODE_SPACING = 180.0
+LEVEL_SPACING = 120.0
+
+def hierarchical_layout(nodes: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[float, float]]:
+    """
+    Compute a top-down tree layout from the 'level' and 'parent_id' node attributes.
+    
+    Leaves take consecutive slots NODE_SPACING apart and each parent is centred
+    over its children, so sibling subtrees never overlap.
+    """
+    children: Dict[str, List[str]] = defaultdict(list)
+    roots = []
+    for node_id, attrs in nodes.items():
+        parent_id = attrs.get('parent_id')
+        if parent_id is None:
+            roots.append(node_id)
+        else:
+            children[parent_id].append(node_id)
+    
+    pos: Dict[str, Tuple[float, float]] = {}
+    next_slot = 0
+    
+    def place(node_id):
+        nonlocal next_slot
+        kids = children.get(node_id, [])
+        for kid in kids:
+            place(kid)
+        if kids:
+            x = (pos[kids[0]][0] + pos[kids[-1]][0]) / 2
+        else:
+            x = next_slot * NODE_SPACING
+            next_slot += 1
+        pos[node_id] = (x, nodes[node_id].get('level', 0) * LEVEL_SPACING)
+    
+    for root in roots:
+        place(root)
+    
+    return pos
+
 def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
     """
     Core logic for generating mindmap data.
@@ -259,56 +398,6 @@ def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
         'subject': subject
     })
     
-    # Define JSON schema for strict response format enforcement
-    mindmap_schema = {
-        "type": "object",
-        "properties": {
-            "nodes": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "id": {
-                            "type": "string",
-                            "description": "A unique identifier for the node, should be a concise, URL-friendly slug."
-                        },
-                        "label": {
-                            "type": "string",
-                            "description": "The human-readable title of the concept."
-                        },
-                        "description": {
-                            "type": "string",
-                            "description": "A brief, one-sentence explanation of the concept."
-                        }
-                    },
-                    "required": ["id", "label", "description"]
-                }
-            },
-            "edges": {
-                "type": "array",
-                "items": {
-                    "type": "object",
-                    "properties": {
-                        "source": {
-                            "type": "string",
-                            "description": "The 'id' of the source node."
-                        },
-                        "target": {
-                            "type": "string",
-                            "description": "The 'id' of the target node."
-                        },
-                        "label": {
-                            "type": "string",
-                            "description": "Optional label for the relationship."
-                        }
-                    },
-                    "required": ["source", "target"]
-                }
-            }
-        },
-        "required": ["nodes", "edges"]
-    }
-    
     # Generate mindmap structure using AI with schema enforcement
     prompt = generate_mindmap_prompt(subject)
     
@@ -318,26 +407,40 @@ def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
             prompt,
             generation_config=genai.GenerationConfig(
                 response_mime_type="application/json",
-                response_schema=mindmap_schema
+                response_schema=_MINDMAP_SCHEMA
             )
         )
         
+        # Reject runaway output before materializing it; schema-constrained mindmaps are a few KB
+        response_bytes = response.text.encode()
+        if len(response_bytes) > MAX_RESPONSE_BYTES:
+            raise ValueError(f"AI response too large ({len(response_bytes)} bytes, limit {MAX_RESPONSE_BYTES})")
+        
         # Parse AI response - should be guaranteed valid JSON due to schema enforcement
-        mindmap_data = json.loads(response.text)
+        mindmap_data = orjson.loads(response_bytes)
         
         logger.info(f"Successfully generated schema-compliant mindmap data for job {job_id}", extra={
             'job_id': job_id,
+            'response_bytes': len(response_bytes),
             'node_count': len(mindmap_data.get('nodes', [])),
             'edge_count': len(mindmap_data.get('edges', []))
         })
         
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error(f"Failed to parse AI response as JSON for job {job_id} (schema enforcement failed)", extra={
             'job_id': job_id,
             'ai_response': response.text[:500],  # Log first 500 chars
             'parse_error': str(e)
         })
         raise ValueError(f"Invalid JSON response from AI despite schema enforcement: {str(e)}")
+    except GoogleAPICallError as e:
+        logger.error(f"Google AI API call failed for job {job_id}", extra={
+            'job_id': job_id,
+            'error_code': getattr(e, 'code', 'unknown'),
+            'generation_error': str(e)
+        })
+        # Re-raised unwrapped so the SQS path can tell transient failures apart
+        raise
     except Exception as e:
         logger.error(f"Failed to generate content with schema enforcement for job {job_id}", extra={
             'job_id': job_id,
@@ -349,40 +452,34 @@ def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
     if 'nodes' not in mindmap_data or 'edges' not in mindmap_data:
         raise ValueError("AI response missing required 'nodes' or 'edges' fields despite schema enforcement")
     
-    # Create NetworkX graph
-    G = nx.DiGraph()
-    
-    # Add nodes with enhanced attributes
-    for node in mindmap_data['nodes']:
-        # Ensure all required fields are present
-        node_attrs = {
-            'id': node['id'],
-            'label': node['label'],
-            'description': node['description'],
+    # Index nodes by id (dict order keeps the model's node order) with enhanced attributes
+    nodes = {
+        node_id: {
+            'id': node_id,
+            'label': label,
+            'description': description,
             # Add computed attributes for backward compatibility
             'level': 0,  # Will be computed based on graph structure
             'parent_id': None  # Will be computed based on edges
         }
-        G.add_node(node['id'], **node_attrs)
+        for node_id, label, description in map(_NODE_FIELDS, mindmap_data['nodes'])
+    }
     
-    # Add edges with enhanced attributes
-    for edge in mindmap_data['edges']:
-        edge_attrs = {
-            'source': edge['source'],
-            'target': edge['target'],
-            'label': edge.get('label', ''),
-            'relationship': edge.get('label', 'connects to')  # Backward compatibility
-        }
-        G.add_edge(edge['source'], edge['target'], **edge_attrs)
+    # Adjacency lists from edges; edges to unknown node ids are ignored for structure
+    successors: Dict[str, List[str]] = defaultdict(list)
+    has_parent = set()
+    for source, target in map(_EDGE_ENDS, mindmap_data['edges']):
+        if source in nodes and target in nodes:
+            successors[source].append(target)
+            has_parent.add(target)
     
     # Compute hierarchical levels and parent relationships
     try:
         # Find root nodes (nodes with no incoming edges)
-        root_nodes = [node for node in G.nodes() if G.in_degree(node) == 0]
+        root_nodes = [node_id for node_id in nodes if node_id not in has_parent]
         
         if root_nodes:
             # Perform BFS to assign levels
-            from collections import deque
             queue = deque([(root, 0) for root in root_nodes])
             visited = set()
             
@@ -392,18 +489,18 @@ def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
                     continue
                     
                 visited.add(node_id)
-                G.nodes[node_id]['level'] = level
+                nodes[node_id]['level'] = level
                 
                 # Set parent_id for children
-                for child in G.successors(node_id):
+                for child in successors[node_id]:
                     if child not in visited:
-                        G.nodes[child]['parent_id'] = node_id
+                        nodes[child]['parent_id'] = node_id
                         queue.append((child, level + 1))
                         
         logger.info(f"Computed hierarchical structure for job {job_id}", extra={
             'job_id': job_id,
             'root_nodes': len(root_nodes),
-            'max_level': max([G.nodes[n].get('level', 0) for n in G.nodes()], default=0)
+            'max_level': max((attrs['level'] for attrs in nodes.values()), default=0)
         })
         
     except Exception as e:
@@ -412,83 +509,28 @@ def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
             'structure_error': str(e)
         })
     
-    logger.info(f"Created graph with {G.number_of_nodes()} nodes and {G.number_of_edges()} edges", extra={
+    logger.info(f"Built mindmap tree with {len(nodes)} nodes and {len(mindmap_data['edges'])} edges", extra={
         'job_id': job_id,
-        'node_count': G.number_of_nodes(),
-        'edge_count': G.number_of_edges()
+        'node_count': len(nodes),
+        'edge_count': len(mindmap_data['edges'])
     })
     
-    # Calculate layout using available layout engines
+    # Calculate a top-down tree layout in-process (no graphviz subprocess)
     try:
-        # Try to use pygraphviz for advanced dot layout if available
-        try:
-            import pygraphviz as pgv
-            # Convert NetworkX graph to pygraphviz for layout calculation
-            A = nx.nx_agraph.to_agraph(G)
-            A.layout(prog='dot')
-            
-            # Extract positions from pygraphviz layout
-            positioned_nodes = []
-            for node_id in G.nodes():
-                node_attrs = G.nodes[node_id].copy()  # Get all node attributes from graph
-                
-                try:
-                    # Get node position from pygraphviz
-                    agraph_node = A.get_node(node_id)
-                    pos_str = agraph_node.attr['pos']
-                    x, y = map(float, pos_str.split(','))
-                    
-                    # Scale positions for better visualization
-                    node_attrs['x'] = float(x)
-                    node_attrs['y'] = float(y)
-                except (KeyError, ValueError, AttributeError):
-                    # Fallback position if node not found or position parsing fails
-                    logger.warning(f"Could not get position for node {node_id}, using fallback", extra={
-                        'job_id': job_id,
-                        'node_id': node_id
-                    })
-                    node_attrs['x'] = 0.0
-                    node_attrs['y'] = 0.0
-                
-                positioned_nodes.append(node_attrs)
-                
-            logger.info(f"Successfully generated mindmap with pygraphviz dot layout for job {job_id}", extra={
-                'job_id': job_id,
-                'final_node_count': len(positioned_nodes)
-            })
-            
-        except ImportError:
-            # Fallback to NetworkX built-in layout algorithms
-            logger.info(f"Pygraphviz not available, using NetworkX spring layout for job {job_id}", extra={
-                'job_id': job_id
-            })
-            
-            # Use NetworkX spring layout as fallback
-            if G.number_of_nodes() > 0:
-                pos = nx.spring_layout(G, k=3, iterations=50, seed=42)
-            else:
-                pos = {}
+        pos = hierarchical_layout(nodes)
+        
+        positioned_nodes = []
+        for node_id, attrs in nodes.items():
+            node_attrs = attrs.copy()
+            x, y = pos.get(node_id, (0.0, 0.0))
+            node_attrs['x'] = float(x)
+            node_attrs['y'] = float(y)
+            positioned_nodes.append(node_attrs)
             
-            # Extract positions from NetworkX layout
-            positioned_nodes = []
-            for node_id in G.nodes():
-                node_attrs = G.nodes[node_id].copy()  # Get all node attributes from graph
-                
-                if node_id in pos:
-                    # Scale positions for better visualization (NetworkX uses [-1, 1] range)
-                    node_attrs['x'] = float(pos[node_id][0] * 200)  # Scale to reasonable pixel range
-                    node_attrs['y'] = float(pos[node_id][1] * 200)
-                else:
-                    # Fallback position
-                    node_attrs['x'] = 0.0
-                    node_attrs['y'] = 0.0
-                
-                positioned_nodes.append(node_attrs)
-                
-            logger.info(f"Successfully generated mindmap with NetworkX spring layout for job {job_id}", extra={
-                'job_id': job_id,
-                'final_node_count': len(positioned_nodes)
-            })
+        logger.info(f"Successfully generated mindmap with hierarchical layout for job {job_id}", extra={
+            'job_id': job_id,
+            'final_node_count': len(positioned_nodes)
+        })
         
         # Return final mindmap data with positions
         final_data = {
@@ -497,24 +539,23 @@ def process_mindmap_generation(job_id: str, subject: str) -> Dict[str, Any]:
             'edges': mindmap_data['edges'],
             'metadata': {
                 'subject': subject,
-                'generated_at': datetime.utcnow().isoformat(),
+                'generated_at': _utc_timestamp(),
                 'node_count': len(positioned_nodes),
                 'edge_count': len(mindmap_data['edges']),
-                'layout_engine': 'dot'
+                'layout_engine': 'hierarchical'
             }
         }
         
         return final_data
         
     except Exception as e:
-        logger.exception(f"Failed to calculate dot layout for job {job_id}", extra={
+        logger.exception(f"Failed to calculate layout for job {job_id}", extra={
             'job_id': job_id,
             'layout_error': str(e)
         })
         raise
 
 @logger.inject_lambda_context(log_event=True)
-@idempotent(config=idempotency_config, persistence_store=persistence_layer)
 def handler(event, context):
     """
     AWS Lambda handler for processing mindmap generation jobs.
@@ -534,10 +575,11 @@ def handler(event, context):
     
     # Determine event source
     if 'Records' in event and event['Records']:
-        # SQS event
+        # SQS event; each record is deduplicated on its own message body
+        idempotency_config.register_lambda_context(context)
         return handle_sqs_event(event, context)
     else:
-        # API Gateway event
+        # API Gateway event; jobs are queued, so deduplication happens on the SQS side
         return handle_api_event(event, context)
 
 def handle_api_event(event, context):
@@ -546,13 +588,13 @@ def handle_api_event(event, context):
     """
     try:
         # Parse request body
-        body = json.loads(event.get('body', '{}'))
+        body = orjson.loads(event.get('body', '{}'))
         job_id = body.get('jobId')
         subject = body.get('subject')
         
         # Generate jobId if not provided
         if not job_id:
-            job_id = f"api-{int(datetime.utcnow().timestamp() * 1000)}"
+            job_id = f"api-{int(time.time() * 1000)}"
         
         if not subject:
             return {
@@ -563,22 +605,22 @@ def handle_api_event(event, context):
                     'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
                     'Access-Control-Allow-Methods': 'POST,OPTIONS'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'error': 'Missing required field: subject',
                     'success': False
-                })
+                }).decode()
             }
         
         # Queue the job for processing
         queue_url = os.environ.get('SQS_QUEUE_URL')
         if queue_url:
-            sqs_client.send_message(
+            get_aws_client('sqs').send_message(
                 QueueUrl=queue_url,
-                MessageBody=json.dumps({
+                MessageBody=orjson.dumps({
                     'jobId': job_id,
                     'subject': subject,
-                    'timestamp': datetime.utcnow().isoformat()
-                })
+                    'timestamp': _utc_timestamp()
+                }).decode()
             )
             
             return {
@@ -589,15 +631,16 @@ def handle_api_event(event, context):
                     'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
                     'Access-Control-Allow-Methods': 'POST,OPTIONS'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'jobId': job_id,
                     'status': 'queued',
                     'message': 'Mindmap generation job queued successfully',
                     'success': True
-                })
+                }).decode()
             }
         else:
             # Process synchronously if no queue configured
+            ensure_clients()
             mindmap_data = process_mindmap_generation(job_id, subject)
             
             return {
@@ -608,12 +651,12 @@ def handle_api_event(event, context):
                     'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
                     'Access-Control-Allow-Methods': 'POST,OPTIONS'
                 },
-                'body': json.dumps({
+                'body': orjson.dumps({
                     'jobId': job_id,
                     'status': 'completed',
                     'data': mindmap_data,
                     'success': True
-                })
+                }).decode()
             }
             
     except Exception as e:
@@ -626,107 +669,208 @@ def handle_api_event(event, context):
                 'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
                 'Access-Control-Allow-Methods': 'POST,OPTIONS'
             },
-            'body': json.dumps({
+            'body': orjson.dumps({
                 'error': str(e),
                 'success': False
-            })
+            }).decode()
         }
 
-def handle_sqs_event(event, context):
-    """
-    Handle SQS events for asynchronous mindmap generation.
+# Errors worth redelivering through SQS rather than marking the job failed
+RETRYABLE_GOOGLE_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_AWS_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'ProvisionedThroughputExceededException',
+    'ServiceUnavailable',
+    'InternalError'
+}
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether an error is likely to succeed on retry (rate limiting or a server-side fault)."""
+    if isinstance(error, GoogleAPICallError):
+        return getattr(error, 'code', None) in RETRYABLE_GOOGLE_CODES
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in RETRYABLE_AWS_CODES
+    return False
+
+def process_record(record) -> Optional[Dict[str, Any]]:
     """
-    # Initialize clients if not already done
-    initialize_clients()
-    
-    results = []
+    Process a single SQS record; errors are recorded against the job rather than raised.
     
-    # Process each SQS record
-    for record in event.get('Records', []):
-        try:
-            # Parse message body
-            message_body = json.loads(record['body'])
-            job_id = message_body.get('jobId')
-            subject = message_body.get('subject')
-            
-            if not job_id or not subject:
-                logger.error("Missing required fields in message", extra={
-                    'message_body': message_body,
-                    'missing_job_id': not job_id,
-                    'missing_subject': not subject
-                })
-                continue
-            
-            logger.info(f"Processing mindmap generation job", extra={
-                'job_id': job_id,
-                'subject': subject,
-                'record_id': record.get('messageId')
+    Transient errors are not written to Supabase; the record is reported with status
+    'retry' so SQS redelivers it.
+    """
+    job_id = None
+    try:
+        # Parse message body
+        message_body = orjson.loads(record['body'])
+        job_id = message_body.get('jobId')
+        subject = message_body.get('subject')
+        
+        if not job_id or not subject:
+            logger.error("Missing required fields in message", extra={
+                'message_body': message_body,
+                'missing_job_id': not job_id,
+                'missing_subject': not subject
             })
-            
-            # Update status to processing
+            return None
+        
+        logger.info(f"Processing mindmap generation job", extra={
+            'job_id': job_id,
+            'subject': subject,
+            'record_id': record.get('messageId')
+        })
+        
+        # The intermediate 'processing' write is opt-in; completed/failed is always written
+        if EMIT_PROCESSING_STATUS:
             update_job_status(job_id, 'processing')
-            
-            # Generate mindmap
-            mindmap_data = process_mindmap_generation(job_id, subject)
-            
-            # Save results and update status to completed
-            update_job_status(job_id, 'completed', result_data=mindmap_data)
-            
-            results.append({
-                'job_id': job_id,
-                'status': 'completed',
-                'node_count': len(mindmap_data['nodes'])
-            })
-            
-        except ClientError as e:
-            error_msg = f"AWS service error: {str(e)}"
-            logger.exception(f"AWS ClientError for job {job_id}", extra={
-                'job_id': job_id,
-                'error_code': e.response.get('Error', {}).get('Code'),
-                'error_message': str(e)
-            })
-            update_job_status(job_id, 'failed', error_message=error_msg)
-            results.append({'job_id': job_id, 'status': 'failed', 'error': error_msg})
-            
-        except SupabaseAPIError as e:
-            error_msg = f"Supabase API error: {str(e)}"
-            logger.exception(f"Supabase API error for job {job_id}", extra={
-                'job_id': job_id,
-                'error_message': str(e)
-            })
-            update_job_status(job_id, 'failed', error_message=error_msg)
-            results.append({'job_id': job_id, 'status': 'failed', 'error': error_msg})
-            
-        except GoogleAPICallError as e:
-            error_msg = f"Google AI API error: {str(e)}"
-            logger.exception(f"Google AI API error for job {job_id}", extra={
+        
+        # Generate mindmap
+        mindmap_data = process_mindmap_generation(job_id, subject)
+        
+        # Save results and update status to completed
+        update_job_status(job_id, 'completed', result_data=mindmap_data)
+        
+        return {
+            'job_id': job_id,
+            'status': 'completed',
+            'node_count': len(mindmap_data['nodes'])
+        }
+        
+    except ClientError as e:
+        error_msg = f"AWS service error: {str(e)}"
+        if is_transient_error(e):
+            logger.warning(f"Transient AWS error for job {job_id}, leaving for SQS retry", extra={
                 'job_id': job_id,
-                'error_code': getattr(e, 'code', 'unknown'),
-                'error_message': str(e)
+                'error_code': e.response.get('Error', {}).get('Code')
             })
-            update_job_status(job_id, 'failed', error_message=error_msg)
-            results.append({'job_id': job_id, 'status': 'failed', 'error': error_msg})
-            
-        except Exception as e:
-            error_msg = f"Unexpected error: {str(e)}"
-            logger.exception(f"Unexpected error for job {job_id}", extra={
+            return {'job_id': job_id, 'status': 'retry', 'message_id': record.get('messageId'), 'error': error_msg}
+        logger.exception(f"AWS ClientError for job {job_id}", extra={
+            'job_id': job_id,
+            'error_code': e.response.get('Error', {}).get('Code'),
+            'error_message': str(e)
+        })
+        update_job_status(job_id, 'failed', error_message=error_msg)
+        return {'job_id': job_id, 'status': 'failed', 'error': error_msg}
+        
+    except SupabaseAPIError as e:
+        error_msg = f"Supabase API error: {str(e)}"
+        logger.exception(f"Supabase API error for job {job_id}", extra={
+            'job_id': job_id,
+            'error_message': str(e)
+        })
+        update_job_status(job_id, 'failed', error_message=error_msg)
+        return {'job_id': job_id, 'status': 'failed', 'error': error_msg}
+        
+    except GoogleAPICallError as e:
+        error_msg = f"Google AI API error: {str(e)}"
+        if is_transient_error(e):
+            logger.warning(f"Transient Google AI API error for job {job_id}, leaving for SQS retry", extra={
                 'job_id': job_id,
-                'error_type': type(e).__name__,
-                'error_message': str(e)
+                'error_code': getattr(e, 'code', 'unknown')
             })
-            update_job_status(job_id, 'failed', error_message=error_msg)
-            results.append({'job_id': job_id, 'status': 'failed', 'error': error_msg})
+            return {'job_id': job_id, 'status': 'retry', 'message_id': record.get('messageId'), 'error': error_msg}
+        logger.exception(f"Google AI API error for job {job_id}", extra={
+            'job_id': job_id,
+            'error_code': getattr(e, 'code', 'unknown'),
+            'error_message': str(e)
+        })
+        update_job_status(job_id, 'failed', error_message=error_msg)
+        return {'job_id': job_id, 'status': 'failed', 'error': error_msg}
+        
+    except Exception as e:
+        error_msg = f"Unexpected error: {str(e)}"
+        logger.exception(f"Unexpected error for job {job_id}", extra={
+            'job_id': job_id,
+            'error_type': type(e).__name__,
+            'error_message': str(e)
+        })
+        update_job_status(job_id, 'failed', error_message=error_msg)
+        return {'job_id': job_id, 'status': 'failed', 'error': error_msg}
+
+class RecordRetryRequested(Exception):
+    """Raised so Powertools drops the idempotency record of a message that SQS will redeliver."""
+    
+    def __init__(self, result: Dict[str, Any]):
+        super().__init__(result['error'])
+        self.result = result
+
+@idempotent_function(data_keyword_argument='record', config=idempotency_config, persistence_store=persistence_layer)
+def process_record_idempotent(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Process a record at most once per message body; duplicates get the stored result back.
+    """
+    result = process_record(record)
+    if result is not None and result['status'] == 'retry':
+        # Storing this result would make the redelivered message a cached no-op
+        raise RecordRetryRequested(result)
+    return result
+
+def run_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Run one record through the idempotent path, turning every outcome into a result dict (None drops the record).
+    """
+    try:
+        return process_record_idempotent(record=record)
+    except RecordRetryRequested as e:
+        return e.result
+    except IdempotencyAlreadyInProgressError:
+        # A duplicate of this message is being processed right now; let SQS redeliver it later
+        return {'job_id': None, 'status': 'retry', 'message_id': record.get('messageId'),
+                'error': 'Duplicate message already in progress'}
+    except IdempotencyKeyError as e:
+        # A record without a body can never succeed; log it rather than letting SQS redeliver it
+        logger.error("Malformed SQS record: no idempotency key", extra={
+            'record_id': record.get('messageId'),
+            'error_message': str(e)
+        })
+        return None
+    except Exception as e:
+        # Status update inside the failure path itself raised
+        logger.error(f"Record processing failed: {e}")
+        return {'job_id': None, 'status': 'failed', 'error': str(e)}
+
+def process_records(records: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Process SQS records concurrently; each record's Gemini and Supabase calls run in a worker thread.
+    """
+    if len(records) <= 1:
+        return [run_record(record) for record in records]
+    
+    # Bounded pool: threads release the GIL on I/O, but more workers than records or
+    # than the configured cap only adds contention on the shared HTTP connection pools
+    with ThreadPoolExecutor(max_workers=min(len(records), RECORD_WORKERS)) as executor:
+        return list(executor.map(run_record, records))
+
+def handle_sqs_event(event, context):
+    """
+    Handle SQS events for asynchronous mindmap generation.
+    """
+    # Fall back to lazy initialization if the import-time attempt failed
+    ensure_clients()
+    
+    # Process the batch concurrently; records are independent and I/O-bound
+    results = [r for r in process_records(event.get('Records', [])) if r is not None]
+    
+    # Partial batch response: only transiently failed records are redelivered by SQS
+    batch_item_failures = [
+        {'itemIdentifier': r['message_id']} for r in results if r['status'] == 'retry'
+    ]
     
     logger.info(f"Completed processing {len(results)} jobs", extra={
         'total_jobs': len(results),
         'completed_jobs': len([r for r in results if r['status'] == 'completed']),
-        'failed_jobs': len([r for r in results if r['status'] == 'failed'])
+        'failed_jobs': len([r for r in results if r['status'] == 'failed']),
+        'retry_jobs': len(batch_item_failures)
     })
     
     return {
         'statusCode': 200,
-        'body': json.dumps({
+        'batchItemFailures': batch_item_failures,
+        'body': orjson.dumps({
             'processed_jobs': len(results),
             'results': results
-        })
-    }
\ No newline at end of file
+        }).decode()
+    }
@@ -1,17 +1,37 @@
+import os
 from setuptools import setup, find_packages
 
+# Opt-in ahead-of-time compilation of the agent hot paths with mypyc.
+# The .py sources still ship, so environments without the compiled
+# extensions fall back to the interpreted modules. SensaBaseAgent stays
+# interpreted because the other agents subclass it.
+ext_modules = []
+if os.environ.get("SENSA_MYPYC") == "1":
+    from mypyc.build import mypycify
+    ext_modules = mypycify([
+        "--ignore-missing-imports",
+        "--follow-imports=silent",
+        "src/agents/study_map_agent.py",
+    ])
+
 setup(
     name="sensa-agents",
     version="1.0.0",
     description="Sensa AI Multi-Agent System",
     packages=find_packages(),
+    ext_modules=ext_modules,
     install_requires=[
         "google-generativeai>=0.3.0",
         "supabase>=2.0.0",
         "pydantic>=2.0.0",
         "httpx>=0.25.0",
         "python-dotenv>=1.0.0",
-        "functions-framework>=3.0.0"
+        "functions-framework>=3.0.0",
+        "orjson>=3.9.0"
     ],
+    extras_require={
+        "redis": ["redis>=5.0.0"],
+        "asgi": ["fastapi>=0.110.0", "uvicorn[standard]>=0.27.0"],
+    },
     python_requires=">=3.12",
-)
\ No newline at end of file
+)
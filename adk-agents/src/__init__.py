@@ -1,12 +1,24 @@
-from .main import sensa_agents_handler, health_check
+from importlib import import_module
 from .agents import OrchestratorAgent
 from .config import config
 
 __version__ = "1.0.0"
 
+# The Cloud Functions handlers are resolved on first access (PEP 562), so importing the
+# package (e.g. for src.asgi) doesn't load Flask or start main.py's event-loop thread
+_HANDLERS = ('sensa_agents_handler', 'sensa_agents_stream_handler', 'health_check')
+
+def __getattr__(name):
+    if name in _HANDLERS:
+        value = getattr(import_module('.main', __name__), name)
+        globals()[name] = value  # later lookups are plain module attribute hits
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     'sensa_agents_handler',
+    'sensa_agents_stream_handler',
     'health_check',
     'OrchestratorAgent',
     'config'
-] 
\ No newline at end of file
+]
@@ -1,50 +1,26 @@
-from typing import Dict, Any, List
+from typing import ClassVar, Dict, Any, List
 from ..base_agent import SensaBaseAgent
 from ..types import CareerPathway, CareerPathwayResponse, CourseAnalysisResult
 
 class CareerPathwayAgent(SensaBaseAgent):
     """Agent specialized in generating personalized career pathways and recommendations"""
     
-    def __init__(self):
-        super().__init__("CareerPathwayAgent")
-    
-    async def generate_career_pathways(self, course_analysis: CourseAnalysisResult, learning_profile: Dict[str, Any], user_memories: List[Dict]) -> CareerPathwayResponse:
-        """Generate both traditional and personalized career pathways based on course and user profile"""
-        
-        # Extract memory context for personalization
-        memory_context = "\n".join([f"Memory: {mem.get('text', '')}" for mem in user_memories[:3]])
-        
-        system_instructions = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
+    # Static prompt sections, built once per process rather than per call
+    _SYSTEM_INSTRUCTIONS: ClassVar[str] = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
 
 SPECIFIC FOCUS: Generate personalized career pathways that bridge personal history and academic pursuits.
 OUTPUT FORMAT: Traditional career paths and personalized discovery paths with memory connections.
 PRIORITY: Personal relevance, achievable progression, and meaningful career alignment."""
 
-        prompt = f"""{system_instructions}
-
-You are a Career Pathway Agent specializing in creating personalized career recommendations.
+    _AGENT_INSTRUCTIONS: ClassVar[str] = """You are a Career Pathway Agent specializing in creating personalized career recommendations.
 
 SYSTEM INSTRUCTIONS:
 - Generate both traditional career paths and personalized discovery paths
 - Connect career opportunities to the user's personal memories and experiences
 - Focus on achievable progression and meaningful alignment
-- Provide specific, actionable career guidance
-
-COURSE ANALYSIS:
-- Course Name: {course_analysis.course_name}
-- Core Goal: {course_analysis.core_goal}
-- Key Topics: {', '.join(course_analysis.key_topics)}
-- Career Outcomes: {', '.join(course_analysis.career_outcomes)}
-
-LEARNING PROFILE:
-- Dominant Learning Style: {learning_profile.get('dominant_learning_style', 'Multimodal')}
-- Emotional Anchors: {', '.join(learning_profile.get('emotional_anchors', []))}
-- Motivational Triggers: {', '.join(learning_profile.get('motivational_triggers', []))}
+- Provide specific, actionable career guidance"""
 
-USER MEMORIES (for personalization):
-{memory_context}
-
-CAREER PATHWAY FRAMEWORK:
+    _CAREER_FRAMEWORK: ClassVar[str] = """CAREER PATHWAY FRAMEWORK:
 1. Traditional Paths: Standard career progressions related to the course
 2. Discovery Paths: Unique career opportunities that connect to personal memories and interests
 
@@ -59,20 +35,70 @@ Each pathway object should have:
 
 Make the discovery path creative and personally meaningful."""
 
+    _CAREER_FIT_FORMAT: ClassVar[str] = """Provide analysis in JSON format with:
+- fit_score: number between 0-100 indicating career fit
+- strengths: array of why this career suits the user
+- challenges: array of potential challenges or areas for growth
+- development_suggestions: array of specific ways to prepare for this career
+- memory_connections: how the user's experiences relate to this career
+
+Focus on realistic assessment and actionable guidance."""
+    
+    # Fallback values for fields the model omits from a pathway
+    _PATHWAY_DEFAULTS: ClassVar[Dict[str, str]] = {
+        'type': 'The Prominent Path',
+        'field_name': 'Professional Career',
+        'description': 'A career path in this field',
+        'memory_link': 'This connects to your interests and experiences'
+    }
+    
+    # Per-memory character cap; prompt tokens dominate Gemini latency and cost
+    _MEMORY_CHAR_LIMIT: ClassVar[int] = 500
+    
+    def __init__(self):
+        super().__init__("CareerPathwayAgent")
+    
+    def _format_memories(self, user_memories: List[Dict], limit: int) -> str:
+        """Render up to `limit` non-empty memories as prompt lines, each truncated to the character cap"""
+        return "\n".join(
+            f"Memory: {text[:self._MEMORY_CHAR_LIMIT]}"
+            for mem in user_memories[:limit]
+            if (text := (mem.get('text') or '').strip())
+        )
+    
+    async def generate_career_pathways(self, course_analysis: CourseAnalysisResult, learning_profile: Dict[str, Any], user_memories: List[Dict]) -> CareerPathwayResponse:
+        """Generate both traditional and personalized career pathways based on course and user profile"""
+        
+        # Extract memory context for personalization; empty memories are dropped and long ones capped
+        memory_context = self._format_memories(user_memories, 3)
+        
+        prompt = "\n\n".join([
+            self._AGENT_INSTRUCTIONS,
+            f"""COURSE ANALYSIS:
+- Course Name: {course_analysis.course_name}
+- Core Goal: {course_analysis.core_goal}
+- Key Topics: {', '.join(course_analysis.key_topics)}
+- Career Outcomes: {', '.join(course_analysis.career_outcomes)}""",
+            f"""LEARNING PROFILE:
+- Dominant Learning Style: {learning_profile.get('dominant_learning_style', 'Multimodal')}
+- Emotional Anchors: {', '.join(learning_profile.get('emotional_anchors', []))}
+- Motivational Triggers: {', '.join(learning_profile.get('motivational_triggers', []))}""",
+            f"""USER MEMORIES (for personalization):
+{memory_context}""",
+            self._CAREER_FRAMEWORK
+        ])
+
         try:
-            response_text = await self.call_gemini(prompt, temperature=0.6)
+            response_text = await self.call_gemini(prompt, temperature=0.6,
+                                                   system_instruction=self._SYSTEM_INSTRUCTIONS)
             response_data = self.extract_json_from_text(response_text)
             
-            pathways = []
+            # Only the first two pathways are returned, so only those are validated
             pathway_data = response_data.get('pathways', [])
-            
-            for pathway in pathway_data:
-                pathways.append(CareerPathway(
-                    type=pathway.get('type', 'The Prominent Path'),
-                    field_name=pathway.get('field_name', 'Professional Career'),
-                    description=pathway.get('description', 'A career path in this field'),
-                    memory_link=pathway.get('memory_link', 'This connects to your interests and experiences')
-                ))
+            pathways = [
+                CareerPathway.model_validate({**self._PATHWAY_DEFAULTS, **pathway})
+                for pathway in pathway_data[:2]
+            ]
             
             if len(pathways) < 2:
                 raise ValueError("AI response did not return the required number of career pathways")
@@ -86,7 +112,7 @@ Make the discovery path creative and personally meaningful."""
     async def analyze_career_fit(self, career_field: str, learning_profile: Dict[str, Any], user_memories: List[Dict]) -> Dict[str, Any]:
         """Analyze how well a specific career field fits the user's profile"""
         
-        memory_context = "\n".join([f"Memory: {mem.get('text', '')}" for mem in user_memories[:2]])
+        memory_context = self._format_memories(user_memories, 2)
         
         prompt = f"""Analyze the career fit for the following career field based on the user's profile:
 
@@ -100,14 +126,7 @@ LEARNING PROFILE:
 USER MEMORIES:
 {memory_context}
 
-Provide analysis in JSON format with:
-- fit_score: number between 0-100 indicating career fit
-- strengths: array of why this career suits the user
-- challenges: array of potential challenges or areas for growth
-- development_suggestions: array of specific ways to prepare for this career
-- memory_connections: how the user's experiences relate to this career
-
-Focus on realistic assessment and actionable guidance."""
+{self._CAREER_FIT_FORMAT}"""
 
         try:
             response_text = await self.call_gemini(prompt)
@@ -125,7 +144,7 @@ Focus on realistic assessment and actionable guidance."""
             learning_profile = data.get('learning_profile', {})
             user_memories = data.get('user_memories', [])
             result = await self.generate_career_pathways(course_analysis, learning_profile, user_memories)
-            return result.dict()
+            return result.model_dump()
         
         elif action == 'analyze_career_fit':
             career_field = data.get('career_field', '')
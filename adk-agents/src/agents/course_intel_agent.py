@@ -1,17 +1,12 @@
-from typing import Dict, Any
-from ..base_agent import SensaBaseAgent
+from typing import ClassVar, Dict, Any
+from ..base_agent import SensaBaseAgent, stable_course_id
 from ..types import CourseAnalysisResult
 
 class CourseIntelAgent(SensaBaseAgent):
     """Agent specialized in analyzing educational content and course syllabi"""
     
-    def __init__(self):
-        super().__init__("CourseIntelAgent")
-    
-    async def analyze_course_syllabus(self, syllabus: str, course_name: str = "") -> CourseAnalysisResult:
-        """Analyze a course syllabus and extract structured information"""
-        
-        system_instructions = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
+    # Persona prompt for course analysis
+    _SYSTEM_INSTRUCTIONS: ClassVar[str] = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
 
 SPECIFIC FOCUS: Analyze courses and connect concepts to personal memories for deeper understanding.
 OUTPUT FORMAT: Structured course analysis with memory-driven insights and study strategies.
@@ -23,10 +18,14 @@ Course Analysis Guidelines:
 - Create powerful analogies using personal memories
 - Provide specific, actionable study recommendations
 - Identify transferable skills and knowledge"""
-
-        prompt = f"""{system_instructions}
-
-You are a Course Analysis Agent specializing in objective educational content analysis.
+    
+    def __init__(self):
+        super().__init__("CourseIntelAgent")
+    
+    async def analyze_course_syllabus(self, syllabus: str, course_name: str = "") -> CourseAnalysisResult:
+        """Analyze a course syllabus and extract structured information"""
+        
+        prompt = f"""You are a Course Analysis Agent specializing in objective educational content analysis.
 
 SYSTEM INSTRUCTIONS:
 - Extract structured information about learning objectives and competencies
@@ -59,11 +58,12 @@ Provide analysis in JSON format with:
 Focus on depth over breadth. Prioritize actionable insights over general descriptions."""
 
         try:
-            response_text = await self.call_gemini(prompt, temperature=0.4)
+            response_text = await self.call_gemini(prompt, temperature=0.4,
+                                                   system_instruction=self._SYSTEM_INSTRUCTIONS)
             response_data = self.extract_json_from_text(response_text)
             
             return CourseAnalysisResult(
-                course_id=response_data.get('course_id', f"course_{hash(course_name + syllabus) % 100000}"),
+                course_id=response_data.get('course_id', stable_course_id('course', course_name + syllabus)),
                 course_name=response_data.get('course_name', course_name or 'Unknown Course'),
                 university=response_data.get('university', 'General'),
                 core_goal=response_data.get('core_goal', 'Develop knowledge and skills in the subject area'),
@@ -112,7 +112,7 @@ Focus on educational value and learning potential."""
             syllabus = data.get('syllabus', '')
             course_name = data.get('course_name', '')
             result = await self.analyze_course_syllabus(syllabus, course_name)
-            return result.dict()
+            return result.model_dump()
         
         elif action == 'analyze_document':
             document_content = data.get('document_content', '')
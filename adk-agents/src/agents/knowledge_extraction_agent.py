@@ -17,7 +17,7 @@ import re
 from typing import Dict, List, Any, Optional
 from ..base_agent import SensaBaseAgent
 from ..config import config
-import json
+import orjson
 
 class KnowledgeExtractionAgent(SensaBaseAgent):
     """Agent responsible for extracting knowledge from PDFs and generating personalized questionnaires."""
@@ -185,7 +185,7 @@ class KnowledgeExtractionAgent(SensaBaseAgent):
             Focus on identifying topics that would be essential for understanding and applying this material in real-world scenarios.
             """
             
-            response = self.gemini_client.generate_content(prompt)
+            response = self.gemini_model.generate_content(prompt)
             response_text = response.text.strip()
             
             # Extract JSON from response
@@ -194,7 +194,7 @@ class KnowledgeExtractionAgent(SensaBaseAgent):
             
             if json_start != -1 and json_end != -1:
                 json_str = response_text[json_start:json_end]
-                topics = json.loads(json_str)
+                topics = orjson.loads(json_str)
                 
                 self.logger.info(f"Identified {len(topics)} core topics")
                 return topics
@@ -277,7 +277,7 @@ class KnowledgeExtractionAgent(SensaBaseAgent):
             Make questions conversational and relatable. Focus on experiences that could connect to the academic topics in meaningful ways.
             """
             
-            response = self.gemini_client.generate_content(prompt)
+            response = self.gemini_model.generate_content(prompt)
             response_text = response.text.strip()
             
             # Extract JSON from response
@@ -286,7 +286,7 @@ class KnowledgeExtractionAgent(SensaBaseAgent):
             
             if json_start != -1 and json_end != -1:
                 json_str = response_text[json_start:json_end]
-                questionnaire = json.loads(json_str)
+                questionnaire = orjson.loads(json_str)
                 
                 # Add metadata
                 questionnaire["created_at"] = self._get_timestamp()
@@ -1,17 +1,14 @@
-from typing import Dict, Any
+from itertools import chain
+from string import Template
+from typing import ClassVar, Dict, Any, List
 from ..base_agent import SensaBaseAgent
 from ..types import MemoryAnalysisResult
 
 class MemoryAnalysisAgent(SensaBaseAgent):
     """Agent specialized in analyzing user memories for learning insights"""
     
-    def __init__(self):
-        super().__init__("MemoryAnalysisAgent")
-    
-    async def analyze_memory(self, memory_text: str, category: str) -> MemoryAnalysisResult:
-        """Analyze a single memory for themes, emotional tone, and learning indicators"""
-        
-        system_instructions = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
+    # Persona prompt for memory analysis
+    _SYSTEM_INSTRUCTIONS: ClassVar[str] = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
 
 SPECIFIC FOCUS: Analyze personal memories for learning patterns.
 OUTPUT FORMAT: Learning style insights and emotional connections.
@@ -22,10 +19,12 @@ Your Identity & Purpose:
 - You specialize in creating memory-based insights and personalized study strategies
 - You understand that the best learning happens when new concepts connect to existing personal experiences
 - You're empathetic, encouraging, and adapt your teaching style to individual learners"""
-
-        prompt = f"""{system_instructions}
-
-You are a Memory Analysis Agent specializing in real-time analysis of childhood memories for educational personalization.
+    
+    # Memories shorter than this carry no usable signal for the model
+    _MIN_MEMORY_CHARS: ClassVar[int] = 16
+    
+    # Prompt for a single memory analysis
+    _ANALYZE_TMPL: ClassVar[Template] = Template("""You are a Memory Analysis Agent specializing in real-time analysis of childhood memories for educational personalization.
 
 SYSTEM INSTRUCTIONS:
 - Analyze the memory content for learning-relevant patterns
@@ -33,8 +32,8 @@ SYSTEM INSTRUCTIONS:
 - Extract themes that can inform learning personalization
 - Provide confidence assessment of the analysis
 
-CONTEXT: {category}
-MEMORY CONTENT: {memory_text}
+CONTEXT: ${category}
+MEMORY CONTENT: ${memory_text}
 
 ANALYSIS FRAMEWORK:
 1. Thematic Extraction: Identify key themes and patterns
@@ -49,10 +48,39 @@ Provide structured analysis in JSON format with the following fields:
 - confidence: number between 0 and 1
 - insights: string with encouraging insight about learning style
 
-Focus on educational personalization potential."""
+Focus on educational personalization potential.""")
+    
+    # Prompt for synthesizing a learning profile from aggregated analyses
+    _SYNTHESIS_TMPL: ClassVar[Template] = Template("""Based on the following memory analysis data, create a comprehensive learning profile:
+
+THEMES: ${themes}
+LEARNING INDICATORS: ${learning_indicators}
+AVERAGE CONFIDENCE: ${avg_confidence}
+
+Create a learning profile in JSON format with:
+- dominant_learning_style: primary learning style
+- emotional_anchors: key emotional triggers
+- cognitive_patterns: thinking patterns identified
+- motivational_triggers: what motivates this learner
+- study_recommendations: specific study strategies
+
+Focus on actionable insights for personalized learning.""")
+    
+    def __init__(self):
+        super().__init__("MemoryAnalysisAgent")
+    
+    async def analyze_memory(self, memory_text: str, category: str) -> MemoryAnalysisResult:
+        """Analyze a single memory for themes, emotional tone, and learning indicators"""
+        
+        # Too little text to analyze; answer directly instead of spending a Gemini call
+        if not memory_text or len(memory_text.strip()) < self._MIN_MEMORY_CHARS:
+            return self._generate_fallback_analysis(memory_text, category)
+        
+        prompt = self._ANALYZE_TMPL.substitute(category=category, memory_text=memory_text)
 
         try:
-            response_text = await self.call_gemini(prompt, temperature=0.3)
+            response_text = await self.call_gemini(prompt, temperature=0.0, cache_ttl=86400,
+                                                   system_instruction=self._SYSTEM_INSTRUCTIONS)
             response_data = self.extract_json_from_text(response_text)
             
             return MemoryAnalysisResult(
@@ -66,36 +94,20 @@ Focus on educational personalization potential."""
             self.log(f"Error analyzing memory: {str(e)}", "ERROR")
             raise
     
-    async def synthesize_learning_profile(self, memory_analyses: list) -> Dict[str, Any]:
+    async def synthesize_learning_profile(self, memory_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Create a comprehensive learning profile from multiple memory analyses"""
         
-        # Aggregate themes and learning indicators
-        all_themes = []
-        all_learning_indicators = []
-        total_confidence = 0
-        
-        for analysis in memory_analyses:
-            all_themes.extend(analysis.themes)
-            all_learning_indicators.extend(analysis.learning_indicators)
-            total_confidence += analysis.confidence
-        
-        avg_confidence = total_confidence / len(memory_analyses) if memory_analyses else 0
+        # Aggregate themes and learning indicators, de-duplicated in first-seen order
+        themes = dict.fromkeys(chain.from_iterable(analysis.get('themes', []) for analysis in memory_analyses))
+        learning_indicators = dict.fromkeys(chain.from_iterable(analysis.get('learning_indicators', []) for analysis in memory_analyses))
+        avg_confidence = sum(analysis.get('confidence', 0.0) for analysis in memory_analyses) / max(len(memory_analyses), 1)
         
         # Create synthesis prompt
-        prompt = f"""Based on the following memory analysis data, create a comprehensive learning profile:
-
-THEMES: {', '.join(set(all_themes))}
-LEARNING INDICATORS: {', '.join(set(all_learning_indicators))}
-AVERAGE CONFIDENCE: {avg_confidence}
-
-Create a learning profile in JSON format with:
-- dominant_learning_style: primary learning style
-- emotional_anchors: key emotional triggers
-- cognitive_patterns: thinking patterns identified
-- motivational_triggers: what motivates this learner
-- study_recommendations: specific study strategies
-
-Focus on actionable insights for personalized learning."""
+        prompt = self._SYNTHESIS_TMPL.substitute(
+            themes=', '.join(themes),
+            learning_indicators=', '.join(learning_indicators),
+            avg_confidence=avg_confidence
+        )
 
         try:
             response_text = await self.call_gemini(prompt)
@@ -112,16 +124,23 @@ Focus on actionable insights for personalized learning."""
             memory_text = data.get('memory_text', '')
             category = data.get('category', 'general')
             result = await self.analyze_memory(memory_text, category)
-            return result.dict()
+            return result.model_dump()
         
         elif action == 'synthesize_profile':
             memory_analyses = data.get('memory_analyses', [])
-            # Convert dict data back to MemoryAnalysisResult objects
-            analyses = [MemoryAnalysisResult(**analysis) for analysis in memory_analyses]
-            result = await self.synthesize_learning_profile(analyses)
+            # Analyses arrive already serialized by analyze_single_memory; aggregate them as dicts
+            result = await self.synthesize_learning_profile(memory_analyses)
             return result
         
         else:
             raise ValueError(f"Unknown action: {action}")
     
-    # Fallback generation methods removed – rely on upstream error handling. 
\ No newline at end of file
+    def _generate_fallback_analysis(self, memory_text: str, category: str) -> MemoryAnalysisResult:
+        """Zero-confidence analysis for memories too short to analyze; model failures still propagate"""
+        return MemoryAnalysisResult(
+            themes=[category] if category else [],
+            emotional_tone='Reflective',
+            learning_indicators=[],
+            confidence=0.0,
+            insights='Thank you for sharing this memory. Adding a few more details will help us personalize your learning.'
+        )
@@ -1,6 +1,9 @@
 import asyncio
-from typing import Dict, Any, List
-from ..base_agent import SensaBaseAgent
+import threading
+import time
+from datetime import datetime
+from typing import AsyncIterator, ClassVar, Dict, Any, List, Optional, Tuple
+from ..base_agent import SensaBaseAgent, stable_course_id
 from ..types import OrchestratorRequest, OrchestratorResponse, CourseAnalysisResult
 from .memory_analysis_agent import MemoryAnalysisAgent
 from .course_intel_agent import CourseIntelAgent
@@ -15,19 +18,36 @@ from .performance_reporting_agent import PerformanceReportingAgent
 class OrchestratorAgent(SensaBaseAgent):
     """Central coordinator agent that manages all other Sensa agents"""
     
+    # Sub-agents are stateless between calls, so one set is shared by every orchestrator in the process
+    _AGENTS: ClassVar[Optional[Dict[str, SensaBaseAgent]]] = None
+    _AGENTS_LOCK: ClassVar[threading.Lock] = threading.Lock()
+    
+    # Seconds a health check result is served before the agents are probed again
+    _HEALTH_TTL: ClassVar[float] = 5.0
+    
     def __init__(self):
         super().__init__("OrchestratorAgent")
-        self.agents = {
-            'memory_analysis': MemoryAnalysisAgent(),
-            'course_intel': CourseIntelAgent(),
-            'personalization': PersonalizationAgent(),
-            'career_pathway': CareerPathwayAgent(),
-            'study_map': StudyMapAgent(),
-            'knowledge_extraction': KnowledgeExtractionAgent(),
-            'scenario_generation': ScenarioGenerationAgent(),
-            'real_time_scoring': RealTimeScoringAgent(),
-            'performance_reporting': PerformanceReportingAgent()
-        }
+        self.agents = self._get_agents()
+        self._last_health: Optional[Tuple[float, Dict[str, Any]]] = None
+    
+    @classmethod
+    def _get_agents(cls) -> Dict[str, SensaBaseAgent]:
+        """Build the sub-agent registry on first use"""
+        if cls._AGENTS is None:
+            with cls._AGENTS_LOCK:
+                if cls._AGENTS is None:
+                    cls._AGENTS = {
+                        'memory_analysis': MemoryAnalysisAgent(),
+                        'course_intel': CourseIntelAgent(),
+                        'personalization': PersonalizationAgent(),
+                        'career_pathway': CareerPathwayAgent(),
+                        'study_map': StudyMapAgent(),
+                        'knowledge_extraction': KnowledgeExtractionAgent(),
+                        'scenario_generation': ScenarioGenerationAgent(),
+                        'real_time_scoring': RealTimeScoringAgent(),
+                        'performance_reporting': PerformanceReportingAgent()
+                    }
+        return cls._AGENTS
     
     async def delegate_task(self, agent_name: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """Delegate a task to a specific agent"""
@@ -63,7 +83,16 @@ class OrchestratorAgent(SensaBaseAgent):
     
     async def analyze_course_for_user(self, user_id: str, course_query: str = None, course_id: str = None) -> Dict[str, Any]:
         """Orchestrate the end-to-end course analysis process"""
+        result: Dict[str, Any] = {}
+        async for event in self.stream_course_analysis(user_id, course_query, course_id):
+            if event['stage'] in ('complete', 'error'):
+                result = event['data']
+        return result
+    
+    async def stream_course_analysis(self, user_id: str, course_query: str = None, course_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+        """Run the course analysis, yielding each stage's result as soon as it is available"""
         self.log(f"Starting comprehensive course analysis for user {user_id}")
+        pending: List[asyncio.Task] = []
         
         try:
             # Step 1: Retrieve user data
@@ -76,22 +105,30 @@ class OrchestratorAgent(SensaBaseAgent):
             
             # Step 2: Analyze user memories to create learning profile
             self.log("Step 2: Analyzing user memories")
-            memory_analyses = []
             
-            # Analyze each memory
-            for memory in user_memories[:5]:  # Limit to 5 most recent memories
-                memory_result = await self.delegate_task('memory_analysis', {
+            # Analyze memories concurrently; each analysis is an independent Gemini call
+            results = await asyncio.gather(*(
+                self.delegate_task('memory_analysis', {
                     'action': 'analyze_single_memory',
                     'memory_text': memory.get('content', memory.get('text', '')),
                     'category': memory.get('category', 'general')
                 })
-                memory_analyses.append(memory_result)
+                for memory in user_memories[:5]  # Limit to 5 most recent memories
+            ), return_exceptions=True)
+            
+            # Skip individual failures; the profile can be synthesized from the rest
+            memory_analyses = [result for result in results if not isinstance(result, BaseException)]
+            if not memory_analyses:
+                raise results[0]
+            if len(memory_analyses) < len(results):
+                self.log(f"Skipped {len(results) - len(memory_analyses)} failed memory analyses", "WARNING")
             
             # Synthesize learning profile
             learning_profile = await self.delegate_task('memory_analysis', {
                 'action': 'synthesize_profile',
                 'memory_analyses': memory_analyses
             })
+            yield {'stage': 'learning_profile', 'data': learning_profile}
             
             # Step 3: Analyze course content
             self.log("Step 3: Analyzing course content")
@@ -110,32 +147,42 @@ class OrchestratorAgent(SensaBaseAgent):
                 'syllabus': course_syllabus,
                 'course_name': course_name
             })
+            yield {'stage': 'course_analysis', 'data': course_analysis}
             
-            # Step 4: Generate personalized insights
+            # Steps 4 and 5 depend only on the course analysis and learning profile, so they run together
             self.log("Step 4: Creating personalized insights")
-            personalized_insights = await self.delegate_task('personalization', {
+            self.log("Step 5: Generating career pathways")
+            personalization_task = asyncio.create_task(self.delegate_task('personalization', {
                 'action': 'personalize_course',
                 'course_analysis': course_analysis,
                 'learning_profile': learning_profile,
                 'user_memories': user_memories
-            })
-            
-            # Step 5: Generate career pathways
-            self.log("Step 5: Generating career pathways")
-            career_pathways = await self.delegate_task('career_pathway', {
+            }))
+            career_task = asyncio.create_task(self.delegate_task('career_pathway', {
                 'action': 'generate_pathways',
                 'course_analysis': course_analysis,
                 'learning_profile': learning_profile,
                 'user_memories': user_memories
-            })
+            }))
+            pending = [personalization_task, career_task]
+            
+            personalized_insights = await personalization_task
+            yield {'stage': 'personalized_insights', 'data': personalized_insights}
             
-            # Step 6: Create study map
+            # Step 6: Create study map (needs the memory connections from Step 4; overlaps Step 5)
             self.log("Step 6: Creating study map")
-            study_map = await self.delegate_task('study_map', {
+            study_map_task = asyncio.create_task(self.delegate_task('study_map', {
                 'action': 'generate_mermaid',
                 'course_analysis': course_analysis,
                 'personalized_insights': personalized_insights.get('memory_connections', [])
-            })
+            }))
+            pending.append(study_map_task)
+            
+            career_pathways = await career_task
+            yield {'stage': 'career_pathways', 'data': career_pathways}
+            
+            study_map = await study_map_task
+            yield {'stage': 'study_map', 'data': study_map}
             
             # Step 7: Consolidate all results
             self.log("Step 7: Consolidating results")
@@ -148,15 +195,29 @@ class OrchestratorAgent(SensaBaseAgent):
             })
             
             self.log("Course analysis completed successfully")
-            return final_result
+            yield {'stage': 'complete', 'data': final_result}
             
         except Exception as e:
             self.log(f"Course analysis failed: {str(e)}", "ERROR")
-            return {
-                'success': False,
-                'error': str(e),
-                'timestamp': self._get_timestamp()
+            yield {
+                'stage': 'error',
+                'data': {
+                    'success': False,
+                    'error': str(e),
+                    'timestamp': self._get_timestamp()
+                }
             }
+        finally:
+            # Don't leave Gemini calls running after a failure or an abandoned stream
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+    
+    def stream_scenarios(self, core_topics: List[Dict[str, Any]], questionnaire_responses: Dict[str, Any],
+                         num_scenarios: int = 5) -> AsyncIterator[Dict[str, Any]]:
+        """Stream Phase 2 scenario generation, yielding each scenario as soon as it is ready"""
+        self.log("Streaming scenario generation")
+        return self.agents['scenario_generation'].stream_scenario_generation(core_topics, questionnaire_responses, num_scenarios)
     
     async def analyze_memory_only(self, memory_content: str, category: str) -> Dict[str, Any]:
         """Analyze a single memory (for onboarding process)"""
@@ -193,7 +254,7 @@ class OrchestratorAgent(SensaBaseAgent):
             
             # Create a basic course analysis from the input
             course_analysis = CourseAnalysisResult(
-                course_id=f"field_{hash(field_of_study) % 100000}",
+                course_id=stable_course_id('field', field_of_study),
                 course_name=field_of_study,
                 university='General',
                 core_goal=f'Master the fundamentals of {field_of_study}',
@@ -209,7 +270,7 @@ class OrchestratorAgent(SensaBaseAgent):
             # Generate study map
             study_map = await self.delegate_task('study_map', {
                 'action': 'generate_mermaid',
-                'course_analysis': course_analysis.dict(),
+                'course_analysis': course_analysis.model_dump(),
                 'personalized_insights': []
             })
             
@@ -259,6 +320,14 @@ class OrchestratorAgent(SensaBaseAgent):
             user_id = data.get('user_id', '')
             return await self.generate_study_map_only(field_of_study, course_syllabus, user_id)
         
+        elif action == 'generate_scenarios':
+            return await self.delegate_task('scenario_generation', {
+                'action': 'generate_scenarios',
+                'core_topics': data.get('core_topics', []),
+                'questionnaire_responses': data.get('questionnaire_responses', {}),
+                'num_scenarios': data.get('num_scenarios', 5)
+            })
+        
 
         
         else:
@@ -266,24 +335,28 @@ class OrchestratorAgent(SensaBaseAgent):
     
     def _get_timestamp(self) -> str:
         """Get current timestamp"""
-        from datetime import datetime
         return datetime.now().isoformat()
     
     async def health_check(self) -> Dict[str, Any]:
         """Check the health of all agents"""
+        if self._last_health is not None:
+            checked_at, cached_status = self._last_health
+            if time.monotonic() - checked_at < self._HEALTH_TTL:
+                return cached_status
+        
         self.log("Performing health check")
         
+        # Probe every agent concurrently; a failing probe marks only that agent unhealthy
+        probes = await asyncio.gather(*(agent.probe() for agent in self.agents.values()), return_exceptions=True)
+        
         health_status = {
             'orchestrator': 'healthy',
-            'agents': {},
+            'agents': {
+                agent_name: f'unhealthy: {str(probe)}' if isinstance(probe, BaseException) else probe
+                for agent_name, probe in zip(self.agents, probes)
+            },
             'timestamp': self._get_timestamp()
         }
         
-        for agent_name, agent in self.agents.items():
-            try:
-                # Simple health check - just verify the agent can be initialized
-                health_status['agents'][agent_name] = 'healthy'
-            except Exception as e:
-                health_status['agents'][agent_name] = f'unhealthy: {str(e)}'
-        
+        self._last_health = (time.monotonic(), health_status)
         return health_status
\ No newline at end of file
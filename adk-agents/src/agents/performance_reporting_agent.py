@@ -1,7 +1,6 @@
 from typing import Dict, Any, List
 from ..base_agent import SensaBaseAgent
 from ..types import *
-import json
 import statistics
 
 class PerformanceReportingAgent(SensaBaseAgent):
@@ -1,28 +1,21 @@
-from typing import Dict, Any, List
+import asyncio
+from string import Template
+from typing import ClassVar, Dict, Any, List, Optional
 from ..base_agent import SensaBaseAgent
 from ..types import MemoryConnection, PersonalizationResult, CourseAnalysisResult
 
 class PersonalizationAgent(SensaBaseAgent):
     """Agent specialized in creating personalized learning content based on user memories"""
     
-    def __init__(self):
-        super().__init__("PersonalizationAgent")
-    
-    async def create_analogy(self, course_concept: str, learning_profile: Dict[str, Any], user_memories: List[Dict]) -> MemoryConnection:
-        """Generate a personalized analogy for a course concept based on user's memory profile"""
-        
-        # Extract relevant memory content for context
-        memory_context = "\n".join([f"Memory ({mem.get('category', 'general')}): {mem.get('text', '')}" for mem in user_memories[:3]])
-        
-        system_instructions = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
+    # Persona prompt for analogies and study tips
+    _SYSTEM_INSTRUCTIONS: ClassVar[str] = """You are Sensa AI, an advanced educational companion that creates personalized, memory-driven learning experiences. Your core mission is to transform how students learn by connecting new knowledge to their personal memories and experiences.
 
 SPECIFIC FOCUS: Create powerful analogies that connect course concepts to personal memories.
 OUTPUT FORMAT: Personalized analogies with emotional resonance and practical study tips.
 PRIORITY: Deep personal connection, memorable associations, and actionable learning strategies."""
-
-        prompt = f"""{system_instructions}
-
-You are a Personalization Agent specializing in creating memory-driven analogies for educational concepts.
+    
+    # Analogy prompt shared by the single-concept and batched calls; each fills in its concepts and output spec
+    _ANALOGY_TMPL: ClassVar[Template] = Template("""You are a Personalization Agent specializing in creating memory-driven analogies for educational concepts.
 
 SYSTEM INSTRUCTIONS:
 - Create analogies that deeply connect course concepts to personal memories
@@ -30,32 +23,77 @@ SYSTEM INSTRUCTIONS:
 - Focus on emotional resonance and practical applicability
 - Make the learning personal and memorable
 
-COURSE CONCEPT: {course_concept}
+${concepts_block}
 
-LEARNING PROFILE:
-- Dominant Learning Style: {learning_profile.get('dominant_learning_style', 'Multimodal')}
-- Emotional Anchors: {', '.join(learning_profile.get('emotional_anchors', []))}
-- Cognitive Patterns: {', '.join(learning_profile.get('cognitive_patterns', []))}
-- Motivational Triggers: {', '.join(learning_profile.get('motivational_triggers', []))}
+${profile_block}
 
 USER MEMORIES (for context):
-{memory_context}
+${memory_context}
 
 PERSONALIZATION FRAMEWORK:
-1. Memory Connection: Find relevant personal experiences that relate to the concept
+1. Memory Connection: Find relevant personal experiences that relate to ${concept_ref}
 2. Analogy Creation: Build a bridge between the memory and the course concept
 3. Study Strategy: Create actionable study tips based on the analogy and learning style
 
 Provide the result in JSON format with:
-- concept: the course concept being explained
+${output_spec}""")
+    
+    # Output spec for a single concept analogy
+    _SINGLE_OUTPUT_SPEC: ClassVar[str] = """- concept: the course concept being explained
 - analogy: a detailed, personalized analogy connecting to user memories
 - memory_connection: explanation of how the memory relates to the concept
 - study_tip: specific, actionable study advice based on the analogy
 
 Make it personal, memorable, and emotionally resonant."""
+    
+    # Output spec for several concepts answered in one call
+    _BATCH_OUTPUT_SPEC: ClassVar[str] = """- connections: array with one object per course concept, in the order listed above, each with:
+  - concept: the course concept exactly as listed
+  - analogy: a detailed, personalized analogy connecting to user memories
+  - memory_connection: explanation of how the memory relates to the concept
+  - study_tip: specific, actionable study advice based on the analogy
+
+Use different memories across concepts where possible. Make each one personal, memorable, and emotionally resonant."""
+    
+    def __init__(self):
+        super().__init__("PersonalizationAgent")
+    
+    def _format_memory_context(self, user_memories: List[Dict]) -> str:
+        """Render the memories used as analogy context"""
+        return "\n".join([f"Memory ({mem.get('category', 'general')}): {mem.get('text', '')}" for mem in user_memories[:3]])
+    
+    def _format_profile_block(self, learning_profile: Dict[str, Any]) -> str:
+        """Render the learning profile section of the analogy prompts"""
+        return f"""LEARNING PROFILE:
+- Dominant Learning Style: {learning_profile.get('dominant_learning_style', 'Multimodal')}
+- Emotional Anchors: {', '.join(learning_profile.get('emotional_anchors', []))}
+- Cognitive Patterns: {', '.join(learning_profile.get('cognitive_patterns', []))}
+- Motivational Triggers: {', '.join(learning_profile.get('motivational_triggers', []))}"""
+    
+    async def create_analogy(self, course_concept: str, learning_profile: Dict[str, Any], user_memories: List[Dict],
+                             memory_context: Optional[str] = None, profile_block: Optional[str] = None) -> MemoryConnection:
+        """Generate a personalized analogy for a course concept based on user's memory profile"""
+        
+        if not course_concept or not course_concept.strip():
+            raise ValueError("A course concept is required to create an analogy")
+        
+        # Shared context blocks; callers personalizing several topics pass them in precomputed
+        if memory_context is None:
+            memory_context = self._format_memory_context(user_memories)
+        if profile_block is None:
+            profile_block = self._format_profile_block(learning_profile)
+        
+        prompt = self._ANALOGY_TMPL.substitute(
+            concepts_block=f"COURSE CONCEPT: {course_concept}",
+            profile_block=profile_block,
+            memory_context=memory_context,
+            concept_ref="the concept",
+            output_spec=self._SINGLE_OUTPUT_SPEC
+        )
 
         try:
-            response_text = await self.call_gemini(prompt, temperature=0.6)
+            response_text = await self.call_gemini(prompt, temperature=0.6, cache_ttl=3600,
+                                                   system_instruction=self._SYSTEM_INSTRUCTIONS)
             response_data = self.extract_json_from_text(response_text)
             
             return MemoryConnection(
@@ -68,6 +106,56 @@ Make it personal, memorable, and emotionally resonant."""
             self.log(f"Error creating analogy: {str(e)}", "ERROR")
             raise
     
+    async def create_analogies(self, course_concepts: List[str], learning_profile: Dict[str, Any], user_memories: List[Dict],
+                               memory_context: Optional[str] = None, profile_block: Optional[str] = None) -> Dict[str, MemoryConnection]:
+        """Generate personalized analogies for several course concepts in one Gemini call, keyed by concept"""
+        
+        if not course_concepts:
+            return {}
+        
+        # Shared context blocks; callers personalizing several topics pass them in precomputed
+        if memory_context is None:
+            memory_context = self._format_memory_context(user_memories)
+        if profile_block is None:
+            profile_block = self._format_profile_block(learning_profile)
+        topics_block = "\n".join(f"{index}. {concept}" for index, concept in enumerate(course_concepts, 1))
+        
+        prompt = self._ANALOGY_TMPL.substitute(
+            concepts_block=f"COURSE CONCEPTS:\n{topics_block}",
+            profile_block=profile_block,
+            memory_context=memory_context,
+            concept_ref="each concept",
+            output_spec=self._BATCH_OUTPUT_SPEC
+        )
+
+        try:
+            response_text = await self.call_gemini(prompt, temperature=0.6, max_tokens=4096, cache_ttl=3600,
+                                                   system_instruction=self._SYSTEM_INSTRUCTIONS)
+            items = self.extract_json_from_text(response_text).get('connections', [])
+        except Exception as e:
+            self.log(f"Error creating batched analogies: {str(e)}", "ERROR")
+            raise
+        
+        # Match items to requested concepts by name, falling back to list position
+        by_name = {concept.strip().lower(): concept for concept in course_concepts}
+        connections: Dict[str, MemoryConnection] = {}
+        for position, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('analogy'):
+                continue
+            concept = by_name.get(str(item.get('concept', '')).strip().lower())
+            if concept is None and position < len(course_concepts):
+                concept = course_concepts[position]
+            if concept is None or concept in connections:
+                continue
+            connections[concept] = MemoryConnection(
+                concept=concept,
+                analogy=item['analogy'],
+                memory_connection=item.get('memory_connection', 'This connects to your personal experiences'),
+                study_tip=item.get('study_tip', 'Practice relating this concept to your daily life')
+            )
+        
+        return connections
+    
     async def generate_study_tip(self, course_concept: str, learning_profile: Dict[str, Any]) -> str:
         """Generate an actionable study tip aligned with the user's learning style"""
         
@@ -86,7 +174,7 @@ The study tip should:
 Provide just the study tip as a clear, concise sentence."""
 
         try:
-            response_text = await self.call_gemini(prompt, temperature=0.5)
+            response_text = await self.call_gemini(prompt, temperature=0.0, cache_ttl=3600)
             return response_text.strip()
         except Exception as e:
             self.log(f"Error generating study tip: {str(e)}", "ERROR")
@@ -95,19 +183,36 @@ Provide just the study tip as a clear, concise sentence."""
     async def personalize_course_content(self, course_analysis: CourseAnalysisResult, learning_profile: Dict[str, Any], user_memories: List[Dict]) -> PersonalizationResult:
         """Create personalized content for an entire course based on user profile and memories"""
         
-        memory_connections = []
-        
         # Create personalized connections for key topics
         key_topics = course_analysis.key_topics[:5]  # Limit to top 5 topics
         
-        for topic in key_topics:
-            try:
-                connection = await self.create_analogy(topic, learning_profile, user_memories)
-                memory_connections.append(connection)
-            except Exception as e:
-                self.log(f"Error personalizing topic {topic}: {str(e)}", "ERROR")
+        # Format the shared context once for the batched call and any per-topic fallbacks
+        memory_context = self._format_memory_context(user_memories)
+        profile_block = self._format_profile_block(learning_profile)
+        
+        # One batched call covers every topic; only topics it misses get their own request
+        try:
+            connections = await self.create_analogies(key_topics, learning_profile, user_memories,
+                                                      memory_context, profile_block)
+        except Exception as e:
+            self.log(f"Batched personalization failed, falling back to per-topic calls: {str(e)}", "WARNING")
+            connections = {}
+        
+        missing_topics = [topic for topic in key_topics if topic not in connections]
+        results = await asyncio.gather(
+            *(self.create_analogy(topic, learning_profile, user_memories, memory_context, profile_block)
+              for topic in missing_topics),
+            return_exceptions=True
+        )
+        
+        for topic, result in zip(missing_topics, results):
+            if isinstance(result, BaseException):
                 # Skip this topic if personalization fails
+                self.log(f"Error personalizing topic {topic}: {str(result)}", "ERROR")
                 continue
+            connections[topic] = result
+        
+        memory_connections = [connections[topic] for topic in key_topics if topic in connections]
         
         return PersonalizationResult(memory_connections=memory_connections)
     
@@ -120,7 +225,7 @@ Provide just the study tip as a clear, concise sentence."""
             learning_profile = data.get('learning_profile', {})
             user_memories = data.get('user_memories', [])
             result = await self.create_analogy(concept, learning_profile, user_memories)
-            return result.dict()
+            return result.model_dump()
         
         elif action == 'generate_study_tip':
             concept = data.get('concept', '')
@@ -129,11 +234,12 @@ Provide just the study tip as a clear, concise sentence."""
             return {'study_tip': result}
         
         elif action == 'personalize_course':
-            course_analysis = CourseAnalysisResult(**data.get('course_analysis', {}))
+            # Validated here because the payload may come from a caller as well as from CourseIntelAgent
+            course_analysis = CourseAnalysisResult.model_validate(data.get('course_analysis', {}))
             learning_profile = data.get('learning_profile', {})
             user_memories = data.get('user_memories', [])
             result = await self.personalize_course_content(course_analysis, learning_profile, user_memories)
-            return result.dict()
+            return result.model_dump()
         
         else:
             raise ValueError(f"Unknown action: {action}")
@@ -8,35 +8,62 @@ This agent handles:
 4. Contextualizing academic content with user's real-world experiences
 """
 
-from typing import Dict, List, Any, Optional
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, ClassVar, Dict, List, Any, Optional
 from ..base_agent import SensaBaseAgent
 from ..config import config
-import json
+import orjson
 import random
 
+# Topic difficulties suited to each experience level (one level of stretch); advanced users take every topic
+_ALLOWED_DIFFICULTIES = {
+    "beginner": frozenset({"beginner", "intermediate"}),
+    "intermediate": frozenset({"beginner", "intermediate", "advanced"}),
+}
+
+def _extract_first_json(text: str) -> Optional[str]:
+    """Return the first balanced JSON object in text, scanning it once."""
+    start = text.find('{')
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+def _load_json_object(text: str) -> Optional[Any]:
+    """Parse a model response as JSON, scanning for the first object only when it isn't clean JSON."""
+    # JSON mode responses parse directly; the interpreted scan is the fallback for wrapped output
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        json_str = _extract_first_json(text)
+        return orjson.loads(json_str) if json_str is not None else None
+
 class ScenarioGenerationAgent(SensaBaseAgent):
     """Agent responsible for generating personalized scenarios based on user responses."""
     
-    def __init__(self):
-        super().__init__("ScenarioGenerationAgent")
-    
-    def process_user_responses(self, questionnaire_responses: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Process and analyze user questionnaire responses to extract key insights.
-        
-        Args:
-            questionnaire_responses: User's responses to the Know Me questionnaire
-            
-        Returns:
-            Processed user profile with insights and context factors
-        """
-        try:
-            responses_text = "\n".join([
-                f"Q: {response.get('question', '')}\nA: {response.get('answer', '')}"
-                for response in questionnaire_responses.get('responses', [])
-            ])
-            
-            prompt = f"""
+    # Questionnaire analysis prompt
+    _PROFILE_PROMPT: ClassVar[str] = """
             Analyze these user responses to create a personalized learning profile:
             
             {responses_text}
@@ -74,21 +101,217 @@ class ScenarioGenerationAgent(SensaBaseAgent):
             
             Focus on identifying specific contexts and experiences that can be used to create relatable scenarios.
             """
+    
+    # User profile sent as the system instruction for scenario calls
+    _PROFILE_PREAMBLE: ClassVar[str] = """You write personalized, scenario-based assessment questions for this learner.
+
+User Profile:
+- Experience Level: {experience_level}
+- Professional Context: {professional_context}
+- Learning Style: {learning_style}
+- Technical Background: {technical_background}
+
+Personalization Keywords: {keywords}"""
+    
+    # Single-topic scenario prompt, used when the fused scenario+rubric call fails
+    _SCENARIO_PROMPT: ClassVar[str] = """
+            Create a personalized scenario-based question that combines this academic topic with the user's personal context:
+            
+            Academic Topic: {topic_name}
+            Topic Description: {description}
+            Key Concepts: {key_concepts}
+            
+            Personal Context: {personal_context}
+            
+            Create a scenario that:
+            1. Starts with a relatable situation from their context
+            2. Naturally incorporates the academic topic
+            3. Requires practical application of key concepts
+            4. Feels authentic and relevant to their experience
+            5. Has multiple valid approaches (not just one right answer)
+            
+            Example format: "You're working on [user's context] and need to [apply topic concepts]. How would you approach [specific challenge]?"
+            
+            Return as JSON:
+            {{
+                "scenario_id": "scenario_{scenario_number}",
+                "topic_name": "{topic_name}",
+                "scenario_title": "Brief descriptive title",
+                "scenario_description": "Full scenario description (2-3 sentences)",
+                "question": "Specific question asking how they would handle the situation",
+                "context_type": "{context_type}",
+                "difficulty_level": "{difficulty_level}",
+                "key_concepts_tested": ["concept1", "concept2"],
+                "expected_response_type": "explanation/strategy/step-by-step/analysis",
+                "estimated_time": "3-5 minutes"
+            }}
+            
+            Make it feel like a real situation they might encounter, not an academic exercise.
+            """
+    
+    # Scoring rubric prompt for one scenario
+    _RUBRIC_PROMPT: ClassVar[str] = """
+            Create a dynamic scoring rubric for this scenario question:
+            
+            Scenario: {scenario_description}
+            Question: {question}
+            Topic: {topic_name}
+            Key Concepts: {key_concepts}
+            User Experience Level: {user_level}
+            Expected Response Type: {expected_response_type}
+            
+            Create a rubric that:
+            1. Has 4-6 scoring criteria relevant to the scenario
+            2. Adjusts expectations based on user experience level
+            3. Focuses on practical understanding, not just theory
+            4. Includes both technical accuracy and real-world applicability
+            5. Provides specific indicators for each score level
+            
+            Return as JSON:
+            {{
+                "rubric_id": "rubric_for_{scenario_id}",
+                "total_points": 100,
+                "criteria": [
+                    {{
+                        "criterion_name": "Concept Understanding",
+                        "description": "Demonstrates understanding of key concepts",
+                        "weight": 30,
+                        "score_levels": {{
+                            "excellent": {{
+                                "points": "25-30",
+                                "description": "Clear, accurate understanding with examples",
+                                "indicators": ["specific indicator 1", "indicator 2"]
+                            }},
+                            "good": {{
+                                "points": "20-24",
+                                "description": "Solid understanding with minor gaps",
+                                "indicators": ["indicator 1", "indicator 2"]
+                            }},
+                            "satisfactory": {{
+                                "points": "15-19",
+                                "description": "Basic understanding evident",
+                                "indicators": ["indicator 1", "indicator 2"]
+                            }},
+                            "needs_improvement": {{
+                                "points": "0-14",
+                                "description": "Limited or unclear understanding",
+                                "indicators": ["indicator 1", "indicator 2"]
+                            }}
+                        }}
+                    }}
+                ],
+                "bonus_points": {{
+                    "innovation": 5,
+                    "real_world_insight": 5,
+                    "comprehensive_approach": 5
+                }},
+                "user_level_adjustments": "Expectations adjusted for {user_level} level"
+            }}
+            
+            Adjust the complexity and expectations based on the user's experience level.
+            """
+    
+    # Fused prompt producing a scenario and its scoring rubric in one response
+    _SCENARIO_WITH_RUBRIC_PROMPT: ClassVar[str] = """
+            Create a personalized scenario-based question that combines this academic topic with the user's personal context, together with a scoring rubric for it:
+            
+            Academic Topic: {topic_name}
+            Topic Description: {description}
+            Key Concepts: {key_concepts}
+            
+            Personal Context: {personal_context}
+            
+            The scenario should:
+            1. Start with a relatable situation from their context
+            2. Naturally incorporate the academic topic
+            3. Require practical application of key concepts
+            4. Feel authentic and relevant to their experience
+            5. Have multiple valid approaches (not just one right answer)
+            
+            The rubric should:
+            1. Have 4-6 scoring criteria relevant to the scenario
+            2. Adjust expectations to the user's experience level
+            3. Focus on practical understanding, not just theory
+            4. Include both technical accuracy and real-world applicability
+            5. Provide specific indicators for each score level
             
-            response = self.gemini_client.generate_content(prompt)
-            response_text = response.text.strip()
+            Return as JSON:
+            {{
+                "scenario": {{
+                    "scenario_id": "scenario_{scenario_number}",
+                    "topic_name": "{topic_name}",
+                    "scenario_title": "Brief descriptive title",
+                    "scenario_description": "Full scenario description (2-3 sentences)",
+                    "question": "Specific question asking how they would handle the situation",
+                    "context_type": "{context_type}",
+                    "difficulty_level": "{difficulty_level}",
+                    "key_concepts_tested": ["concept1", "concept2"],
+                    "expected_response_type": "explanation/strategy/step-by-step/analysis",
+                    "estimated_time": "3-5 minutes"
+                }},
+                "rubric": {{
+                    "rubric_id": "rubric_for_scenario_{scenario_number}",
+                    "total_points": 100,
+                    "criteria": [
+                        {{
+                            "criterion_name": "Concept Understanding",
+                            "description": "Demonstrates understanding of key concepts",
+                            "weight": 30,
+                            "score_levels": {{
+                                "excellent": {{"points": "25-30", "description": "Clear, accurate understanding with examples", "indicators": ["indicator 1", "indicator 2"]}},
+                                "good": {{"points": "20-24", "description": "Solid understanding with minor gaps", "indicators": ["indicator 1", "indicator 2"]}},
+                                "satisfactory": {{"points": "15-19", "description": "Basic understanding evident", "indicators": ["indicator 1", "indicator 2"]}},
+                                "needs_improvement": {{"points": "0-14", "description": "Limited or unclear understanding", "indicators": ["indicator 1", "indicator 2"]}}
+                            }}
+                        }}
+                    ],
+                    "bonus_points": {{
+                        "innovation": 5,
+                        "real_world_insight": 5,
+                        "comprehensive_approach": 5
+                    }},
+                    "user_level_adjustments": "How expectations were adjusted for the user's experience level"
+                }}
+            }}
+            
+            Make the scenario feel like a real situation they might encounter, not an academic exercise.
+            """
+    
+    def __init__(self):
+        super().__init__("ScenarioGenerationAgent")
+    
+    async def process_user_responses(self, questionnaire_responses: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process and analyze user questionnaire responses to extract key insights.
+        
+        Args:
+            questionnaire_responses: User's responses to the Know Me questionnaire
+            
+        Returns:
+            Processed user profile with insights and context factors
+        """
+        responses = questionnaire_responses.get('responses', [])
+        
+        try:
+            responses_text = "\n".join([
+                f"Q: {response.get('question', '')}\nA: {response.get('answer', '')}"
+                for response in responses
+            ])
+            
+            prompt = self._PROFILE_PROMPT.format(
+                responses_text=responses_text
+            )
+            
+            response_text = (await self.call_gemini(prompt, temperature=0.2, max_tokens=1024, cache_ttl=86400,
+                                                    response_mime_type='application/json')).strip()
             
             # Extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
+            user_profile = _load_json_object(response_text)
             
-            if json_start != -1 and json_end != -1:
-                json_str = response_text[json_start:json_end]
-                user_profile = json.loads(json_str)
-                
+            if isinstance(user_profile, dict):
                 # Add metadata
                 user_profile["processed_at"] = self._get_timestamp()
-                user_profile["response_count"] = len(questionnaire_responses.get('responses', []))
+                user_profile["response_count"] = len(responses)
                 
                 self.logger.info("Successfully processed user responses")
                 return user_profile
@@ -97,9 +320,9 @@ class ScenarioGenerationAgent(SensaBaseAgent):
                 
         except Exception as e:
             self.logger.error(f"Error processing user responses: {str(e)}")
-            return self._generate_fallback_profile(questionnaire_responses)
+            return self._generate_fallback_profile(len(responses))
     
-    def _generate_fallback_profile(self, questionnaire_responses: Dict[str, Any]) -> Dict[str, Any]:
+    def _generate_fallback_profile(self, response_count: int) -> Dict[str, Any]:
         """Generate a basic user profile when AI processing fails."""
         return {
             "user_profile": {
@@ -120,10 +343,10 @@ class ScenarioGenerationAgent(SensaBaseAgent):
             "personalization_keywords": ["professional", "practical", "efficient"],
             "engagement_triggers": ["practical applications", "real-world examples"],
             "processed_at": self._get_timestamp(),
-            "response_count": len(questionnaire_responses.get('responses', []))
+            "response_count": response_count
         }
     
-    def generate_personalized_scenarios(self, 
+    async def generate_personalized_scenarios(self, 
                                       core_topics: List[Dict[str, Any]], 
                                       user_profile: Dict[str, Any],
                                       num_scenarios: int = 5) -> List[Dict[str, Any]]:
@@ -136,45 +359,75 @@ class ScenarioGenerationAgent(SensaBaseAgent):
             num_scenarios: Number of scenarios to generate
             
         Returns:
-            List of personalized scenario questions with context
+            List of personalized scenario questions with context (each carrying its rubric)
         """
         try:
-            scenarios = []
-            
             # Select topics for scenarios (prioritize by difficulty and user level)
             selected_topics = self._select_topics_for_scenarios(core_topics, user_profile, num_scenarios)
-            
-            for i, topic in enumerate(selected_topics):
-                scenario = self._generate_single_scenario(topic, user_profile, i + 1)
-                if scenario:
-                    scenarios.append(scenario)
-            
-            self.logger.info(f"Generated {len(scenarios)} personalized scenarios")
-            return scenarios
+            topic_to_context = self._build_context_index(user_profile.get("context_factors", []))
+            
+            # Same per-topic scenario+rubric calls as Phase 2, run concurrently
+            generated = await asyncio.gather(*(
+                self._generate_scenario_with_rubric(topic, user_profile, i + 1, topic_to_context)
+                for i, topic in enumerate(selected_topics)
+            ))
+            scenarios = [scenario for scenario in generated if scenario]
+            if scenarios:
+                self.logger.info(f"Generated {len(scenarios)} personalized scenarios")
+                return scenarios
+            self.logger.warning("No scenarios generated, using fallback scenarios")
             
         except Exception as e:
             self.logger.error(f"Error generating scenarios: {str(e)}")
-            return self._generate_fallback_scenarios(core_topics, num_scenarios)
+        return self._generate_fallback_scenarios(core_topics, num_scenarios)
+    
+    def _format_profile_preamble(self, user_profile: Dict[str, Any]) -> str:
+        """Render the user profile shared by every scenario prompt for this user."""
+        user_context = user_profile.get("user_profile", {})
+        keywords = user_profile.get("personalization_keywords", [])
+        return self._PROFILE_PREAMBLE.format(
+            experience_level=user_context.get('experience_level', 'intermediate'),
+            professional_context=user_context.get('professional_context', 'general'),
+            learning_style=user_context.get('learning_style', 'mixed'),
+            technical_background=user_context.get('technical_background', 'moderate'),
+            keywords=', '.join(keywords)
+        )
+    
+    def _build_context_index(self, context_factors: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Map each relevance topic to the first context factor that lists it."""
+        topic_to_context: Dict[str, Dict[str, Any]] = {}
+        for context in context_factors:
+            for topic_name in context.get("relevance_topics", []):
+                topic_to_context.setdefault(topic_name, context)
+        return topic_to_context
+    
+    def _select_context(self,
+                        topic: Dict[str, Any],
+                        topic_to_context: Dict[str, Dict[str, Any]],
+                        context_factors: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Pick the context factor relevant to a topic, falling back to the first one."""
+        return topic_to_context.get(topic["topic_name"], context_factors[0] if context_factors else None)
     
     def _select_topics_for_scenarios(self, 
                                    core_topics: List[Dict[str, Any]], 
                                    user_profile: Dict[str, Any],
                                    num_scenarios: int) -> List[Dict[str, Any]]:
         """Select and prioritize topics for scenario generation based on user profile."""
+        # With no more topics than scenarios every topic is used whatever the filter keeps
+        if len(core_topics) <= num_scenarios:
+            return core_topics
+        
         user_level = user_profile.get("user_profile", {}).get("experience_level", "intermediate")
         
         # Filter topics by appropriate difficulty
-        suitable_topics = []
-        for topic in core_topics:
-            topic_difficulty = topic.get("difficulty_level", "intermediate").lower()
-            
-            # Match topics to user level
-            if user_level == "beginner" and topic_difficulty in ["beginner", "intermediate"]:
-                suitable_topics.append(topic)
-            elif user_level == "intermediate" and topic_difficulty in ["beginner", "intermediate", "advanced"]:
-                suitable_topics.append(topic)
-            elif user_level == "advanced":
-                suitable_topics.append(topic)
+        if user_level == "advanced":
+            suitable_topics = core_topics
+        else:
+            allowed = _ALLOWED_DIFFICULTIES.get(user_level, frozenset())
+            suitable_topics = [
+                topic for topic in core_topics
+                if topic.get("difficulty_level", "intermediate").lower() in allowed
+            ]
         
         # If we don't have enough suitable topics, include all topics
         if len(suitable_topics) < num_scenarios:
@@ -186,81 +439,39 @@ class ScenarioGenerationAgent(SensaBaseAgent):
         else:
             return random.sample(suitable_topics, num_scenarios)
     
-    def _generate_single_scenario(self, 
+    async def _generate_single_scenario(self, 
                                 topic: Dict[str, Any], 
                                 user_profile: Dict[str, Any], 
-                                scenario_number: int) -> Optional[Dict[str, Any]]:
+                                scenario_number: int,
+                                topic_to_context: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
         """Generate a single personalized scenario question."""
         try:
             # Extract user context
-            user_context = user_profile.get("user_profile", {})
             context_factors = user_profile.get("context_factors", [])
-            keywords = user_profile.get("personalization_keywords", [])
+            if topic_to_context is None:
+                topic_to_context = self._build_context_index(context_factors)
             
             # Select relevant context factor
-            relevant_context = None
-            for context in context_factors:
-                if any(topic_name in context.get("relevance_topics", []) for topic_name in [topic["topic_name"]]):
-                    relevant_context = context
-                    break
-            
-            if not relevant_context and context_factors:
-                relevant_context = context_factors[0]  # Use first context as fallback
-            
-            prompt = f"""
-            Create a personalized scenario-based question that combines this academic topic with the user's personal context:
-            
-            Academic Topic: {topic['topic_name']}
-            Topic Description: {topic['description']}
-            Key Concepts: {', '.join(topic.get('key_concepts', []))}
-            
-            User Profile:
-            - Experience Level: {user_context.get('experience_level', 'intermediate')}
-            - Professional Context: {user_context.get('professional_context', 'general')}
-            - Learning Style: {user_context.get('learning_style', 'mixed')}
-            - Technical Background: {user_context.get('technical_background', 'moderate')}
-            
-            Personal Context: {relevant_context.get('description', 'professional environment') if relevant_context else 'work environment'}
-            
-            Personalization Keywords: {', '.join(keywords)}
-            
-            Create a scenario that:
-            1. Starts with a relatable situation from their context
-            2. Naturally incorporates the academic topic
-            3. Requires practical application of key concepts
-            4. Feels authentic and relevant to their experience
-            5. Has multiple valid approaches (not just one right answer)
-            
-            Example format: "You're working on [user's context] and need to [apply topic concepts]. How would you approach [specific challenge]?"
-            
-            Return as JSON:
-            {{
-                "scenario_id": "scenario_{scenario_number}",
-                "topic_name": "{topic['topic_name']}",
-                "scenario_title": "Brief descriptive title",
-                "scenario_description": "Full scenario description (2-3 sentences)",
-                "question": "Specific question asking how they would handle the situation",
-                "context_type": "{relevant_context.get('context_type', 'work') if relevant_context else 'work'}",
-                "difficulty_level": "{topic.get('difficulty_level', 'intermediate')}",
-                "key_concepts_tested": ["concept1", "concept2"],
-                "expected_response_type": "explanation/strategy/step-by-step/analysis",
-                "estimated_time": "3-5 minutes"
-            }}
-            
-            Make it feel like a real situation they might encounter, not an academic exercise.
-            """
-            
-            response = self.gemini_client.generate_content(prompt)
-            response_text = response.text.strip()
+            relevant_context = self._select_context(topic, topic_to_context, context_factors)
+            
+            prompt = self._SCENARIO_PROMPT.format(
+                topic_name=topic['topic_name'],
+                description=topic['description'],
+                key_concepts=', '.join(topic.get('key_concepts', [])),
+                personal_context=relevant_context.get('description', 'professional environment') if relevant_context else 'work environment',
+                scenario_number=scenario_number,
+                context_type=relevant_context.get('context_type', 'work') if relevant_context else 'work',
+                difficulty_level=topic.get('difficulty_level', 'intermediate')
+            )
+            
+            response_text = (await self.call_gemini(prompt, temperature=0.2, max_tokens=1024, cache_ttl=3600,
+                                                    response_mime_type='application/json',
+                                                    system_instruction=self._format_profile_preamble(user_profile))).strip()
             
             # Extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
+            scenario = _load_json_object(response_text)
             
-            if json_start != -1 and json_end != -1:
-                json_str = response_text[json_start:json_end]
-                scenario = json.loads(json_str)
-                
+            if isinstance(scenario, dict):
                 # Add metadata
                 scenario["created_at"] = self._get_timestamp()
                 scenario["personalization_applied"] = True
@@ -296,7 +507,7 @@ class ScenarioGenerationAgent(SensaBaseAgent):
         
         return scenarios
     
-    def generate_dynamic_rubric(self, scenario: Dict[str, Any], user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    async def generate_dynamic_rubric(self, scenario: Dict[str, Any], user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate a dynamic scoring rubric for a specific scenario question.
         
@@ -310,78 +521,23 @@ class ScenarioGenerationAgent(SensaBaseAgent):
         try:
             user_level = user_profile.get("user_profile", {}).get("experience_level", "intermediate")
             
-            prompt = f"""
-            Create a dynamic scoring rubric for this scenario question:
+            prompt = self._RUBRIC_PROMPT.format(
+                scenario_description=scenario.get('scenario_description', ''),
+                question=scenario.get('question', ''),
+                topic_name=scenario.get('topic_name', ''),
+                key_concepts=', '.join(scenario.get('key_concepts_tested', [])),
+                user_level=user_level,
+                expected_response_type=scenario.get('expected_response_type', 'explanation'),
+                scenario_id=scenario.get('scenario_id', 'scenario')
+            )
             
-            Scenario: {scenario.get('scenario_description', '')}
-            Question: {scenario.get('question', '')}
-            Topic: {scenario.get('topic_name', '')}
-            Key Concepts: {', '.join(scenario.get('key_concepts_tested', []))}
-            User Experience Level: {user_level}
-            Expected Response Type: {scenario.get('expected_response_type', 'explanation')}
-            
-            Create a rubric that:
-            1. Has 4-6 scoring criteria relevant to the scenario
-            2. Adjusts expectations based on user experience level
-            3. Focuses on practical understanding, not just theory
-            4. Includes both technical accuracy and real-world applicability
-            5. Provides specific indicators for each score level
-            
-            Return as JSON:
-            {{
-                "rubric_id": "rubric_for_{scenario.get('scenario_id', 'scenario')}",
-                "total_points": 100,
-                "criteria": [
-                    {{
-                        "criterion_name": "Concept Understanding",
-                        "description": "Demonstrates understanding of key concepts",
-                        "weight": 30,
-                        "score_levels": {{
-                            "excellent": {{
-                                "points": 25-30,
-                                "description": "Clear, accurate understanding with examples",
-                                "indicators": ["specific indicator 1", "indicator 2"]
-                            }},
-                            "good": {{
-                                "points": 20-24,
-                                "description": "Solid understanding with minor gaps",
-                                "indicators": ["indicator 1", "indicator 2"]
-                            }},
-                            "satisfactory": {{
-                                "points": 15-19,
-                                "description": "Basic understanding evident",
-                                "indicators": ["indicator 1", "indicator 2"]
-                            }},
-                            "needs_improvement": {{
-                                "points": 0-14,
-                                "description": "Limited or unclear understanding",
-                                "indicators": ["indicator 1", "indicator 2"]
-                            }}
-                        }}
-                    }}
-                ],
-                "bonus_points": {{
-                    "innovation": 5,
-                    "real_world_insight": 5,
-                    "comprehensive_approach": 5
-                }},
-                "user_level_adjustments": "Expectations adjusted for {user_level} level"
-            }}
-            
-            Adjust the complexity and expectations based on the user's experience level.
-            """
-            
-            response = self.gemini_client.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = (await self.call_gemini(prompt, temperature=0.2, max_tokens=2048, cache_ttl=3600,
+                                                    response_mime_type='application/json')).strip()
             
             # Extract JSON from response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
+            rubric = _load_json_object(response_text)
             
-            if json_start != -1 and json_end != -1:
-                json_str = response_text[json_start:json_end]
-                rubric = json.loads(json_str)
-                
+            if isinstance(rubric, dict):
                 # Add metadata
                 rubric["created_at"] = self._get_timestamp()
                 rubric["scenario_id"] = scenario.get("scenario_id")
@@ -442,7 +598,58 @@ class ScenarioGenerationAgent(SensaBaseAgent):
             "adapted_for_user": False
         }
     
-    def process_scenario_generation(self, 
+    async def _generate_scenario_with_rubric(self,
+                                             topic: Dict[str, Any],
+                                             user_profile: Dict[str, Any],
+                                             scenario_number: int,
+                                             topic_to_context: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+        """Generate a scenario and its rubric in one Gemini call, falling back to separate calls."""
+        context_factors = user_profile.get("context_factors", [])
+        if topic_to_context is None:
+            topic_to_context = self._build_context_index(context_factors)
+        
+        try:
+            relevant_context = self._select_context(topic, topic_to_context, context_factors)
+            
+            prompt = self._SCENARIO_WITH_RUBRIC_PROMPT.format(
+                topic_name=topic['topic_name'],
+                description=topic['description'],
+                key_concepts=', '.join(topic.get('key_concepts', [])),
+                personal_context=relevant_context.get('description', 'professional environment') if relevant_context else 'work environment',
+                scenario_number=scenario_number,
+                context_type=relevant_context.get('context_type', 'work') if relevant_context else 'work',
+                difficulty_level=topic.get('difficulty_level', 'intermediate')
+            )
+            
+            response_text = (await self.call_gemini(prompt, temperature=0.2, max_tokens=4096, cache_ttl=3600,
+                                                    response_mime_type='application/json',
+                                                    system_instruction=self._format_profile_preamble(user_profile))).strip()
+            
+            combined = _load_json_object(response_text)
+            if not isinstance(combined, dict) or not isinstance(combined.get("scenario"), dict) or not isinstance(combined.get("rubric"), dict):
+                raise Exception("Could not parse scenario and rubric from AI response")
+            
+            scenario, rubric = combined["scenario"], combined["rubric"]
+            scenario["scenario_id"] = f"scenario_{scenario_number}"
+            scenario.setdefault("topic_name", topic["topic_name"])
+            timestamp = self._get_timestamp()
+            scenario["created_at"] = timestamp
+            scenario["personalization_applied"] = True
+            rubric["created_at"] = timestamp
+            rubric["scenario_id"] = scenario.get("scenario_id")
+            rubric["adapted_for_user"] = True
+            scenario["rubric"] = rubric
+            return scenario
+            
+        except Exception as e:
+            self.logger.error(f"Error generating scenario with rubric for {topic['topic_name']}: {str(e)}")
+        
+        scenario = await self._generate_single_scenario(topic, user_profile, scenario_number, topic_to_context)
+        if scenario:
+            scenario["rubric"] = await self.generate_dynamic_rubric(scenario, user_profile)
+        return scenario
+    
+    async def process_scenario_generation(self, 
                                   core_topics: List[Dict[str, Any]], 
                                   questionnaire_responses: Dict[str, Any],
                                   num_scenarios: int = 5) -> Dict[str, Any]:
@@ -457,24 +664,61 @@ class ScenarioGenerationAgent(SensaBaseAgent):
         Returns:
             Complete Phase 2 results including scenarios and rubrics
         """
+        result: Dict[str, Any] = {}
+        async for event in self.stream_scenario_generation(core_topics, questionnaire_responses, num_scenarios):
+            if event['stage'] in ('complete', 'error'):
+                result = event['data']
+        return result
+    
+    async def stream_scenario_generation(self,
+                                         core_topics: List[Dict[str, Any]],
+                                         questionnaire_responses: Dict[str, Any],
+                                         num_scenarios: int = 5) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run Phase 2, yielding the user profile and then each scenario (with its rubric) as soon as it is ready.
+        
+        Events are dicts with a 'stage' of 'user_profile', 'scenario', 'complete' or 'error' and the
+        stage's 'data'; 'complete' carries the same result process_scenario_generation returns.
+        """
+        pending: List[asyncio.Task] = []
+        
         try:
             self.logger.info("Starting Phase 2: Scenario Generation")
             
             # Step 1: Process user responses
             self.logger.info("Processing user responses...")
-            user_profile = self.process_user_responses(questionnaire_responses)
+            user_profile = await self.process_user_responses(questionnaire_responses)
+            yield {'stage': 'user_profile', 'data': user_profile}
             
-            # Step 2: Generate personalized scenarios
-            self.logger.info("Generating personalized scenarios...")
-            scenarios = self.generate_personalized_scenarios(core_topics, user_profile, num_scenarios)
-            
-            # Step 3: Generate rubrics for each scenario
-            self.logger.info("Generating dynamic rubrics...")
+            # Step 2: Generate each scenario together with its rubric (one call per topic, run concurrently)
+            self.logger.info("Generating personalized scenarios with rubrics...")
+            selected_topics = self._select_topics_for_scenarios(core_topics, user_profile, num_scenarios)
+            topic_to_context = self._build_context_index(user_profile.get("context_factors", []))
+            pending = [
+                asyncio.create_task(self._generate_scenario_with_rubric(topic, user_profile, i + 1, topic_to_context))
+                for i, topic in enumerate(selected_topics)
+            ]
+            
+            # Hand each scenario on in completion order; the final result restores topic order
+            for next_done in asyncio.as_completed(pending):
+                scenario = await next_done
+                if scenario:
+                    yield {'stage': 'scenario', 'data': scenario}
             scenarios_with_rubrics = []
-            for scenario in scenarios:
-                rubric = self.generate_dynamic_rubric(scenario, user_profile)
-                scenario["rubric"] = rubric
-                scenarios_with_rubrics.append(scenario)
+            personalization_applied = True
+            for task in pending:
+                scenario = task.result()
+                if scenario:
+                    scenarios_with_rubrics.append(scenario)
+                    personalization_applied &= bool(scenario.get("personalization_applied", False))
+            
+            if not scenarios_with_rubrics:
+                self.logger.warning("No scenarios generated, using fallback scenarios")
+                scenarios_with_rubrics = self._generate_fallback_scenarios(core_topics, num_scenarios)
+                for scenario in scenarios_with_rubrics:
+                    scenario["rubric"] = self._generate_fallback_rubric(scenario)
+                    personalization_applied &= bool(scenario.get("personalization_applied", False))
+                    yield {'stage': 'scenario', 'data': scenario}
             
             # Compile complete results
             results = {
@@ -484,23 +728,52 @@ class ScenarioGenerationAgent(SensaBaseAgent):
                 "user_profile": user_profile,
                 "scenarios": scenarios_with_rubrics,
                 "scenario_count": len(scenarios_with_rubrics),
-                "personalization_applied": all(s.get("personalization_applied", False) for s in scenarios),
+                "personalization_applied": personalization_applied,
                 "next_phase": "real_time_scoring"
             }
             
             self.logger.info("Phase 2 completed successfully")
-            return results
+            yield {'stage': 'complete', 'data': results}
             
         except Exception as e:
             self.logger.error(f"Phase 2 failed: {str(e)}")
-            return {
-                "phase": "scenario_generation",
-                "status": "failed",
-                "error": str(e),
-                "timestamp": self._get_timestamp()
+            yield {
+                'stage': 'error',
+                'data': {
+                    "phase": "scenario_generation",
+                    "status": "failed",
+                    "error": str(e),
+                    "timestamp": self._get_timestamp()
+                }
             }
+        finally:
+            # Don't leave Gemini calls running after a failure or an abandoned stream
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+    
+    async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Main processing method for the Scenario Generation Agent"""
+        action = data.get('action')
+        
+        if action == 'generate_scenarios':
+            core_topics = data.get('core_topics', [])
+            questionnaire_responses = data.get('questionnaire_responses', {})
+            num_scenarios = data.get('num_scenarios', 5)
+            return await self.process_scenario_generation(core_topics, questionnaire_responses, num_scenarios)
+        
+        elif action == 'process_responses':
+            questionnaire_responses = data.get('questionnaire_responses', {})
+            return await self.process_user_responses(questionnaire_responses)
+        
+        elif action == 'generate_rubric':
+            scenario = data.get('scenario', {})
+            user_profile = data.get('user_profile', {})
+            return await self.generate_dynamic_rubric(scenario, user_profile)
+        
+        else:
+            raise ValueError(f"Unknown action: {action}")
     
     def _get_timestamp(self) -> str:
         """Get current timestamp in ISO format."""
-        from datetime import datetime
         return datetime.now().isoformat()
\ No newline at end of file
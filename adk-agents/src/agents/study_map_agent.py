@@ -1,4 +1,5 @@
-from typing import Dict, Any, List
+import orjson
+from typing import Dict, Any, List, Optional
 from ..base_agent import SensaBaseAgent
 from ..types import StudyMap, MermaidStudyMap, KnowledgeNode, SensaInsight, NodeData, CourseAnalysisResult
 
@@ -26,8 +27,10 @@ Generate JSON with:
 Create a logical flow from prerequisites to advanced concepts."""
 
         try:
-            response_text = await self.call_gemini(prompt, temperature=0.5)
-            response_data = self.extract_json_from_text(response_text)
+            # node_data is a free-form mapping, which Gemini's response_schema cannot
+            # express, so request JSON mode only and validate the shape below.
+            response_text = await self.call_gemini(prompt, temperature=0.5, response_mime_type='application/json')
+            response_data = orjson.loads(response_text)
             
             if 'mermaid_code' not in response_data or not response_data['mermaid_code']:
                 raise ValueError('AI response did not include mermaid_code')
@@ -109,26 +112,26 @@ Organize the content logically from foundational to advanced concepts."""
             course_analysis = CourseAnalysisResult(**data.get('course_analysis', {}))
             personalized_insights = data.get('personalized_insights', [])
             result = await self.generate_mermaid_code(course_analysis, personalized_insights)
-            return result.dict()
+            return result.model_dump()
         
         elif action == 'create_study_guide':
             course_analysis = CourseAnalysisResult(**data.get('course_analysis', {}))
             learning_profile = data.get('learning_profile', {})
-            result = await self.create_study_guide(course_analysis, learning_profile)
-            return result.dict()
+            study_guide = await self.create_study_guide(course_analysis, learning_profile)
+            return study_guide.model_dump()
         
         else:
             raise ValueError(f"Unknown action: {action}")
     
-    def _convert_to_knowledge_node(self, node_data: Dict) -> KnowledgeNode:
+    def _convert_to_knowledge_node(self, node_data: Dict[str, Any]) -> KnowledgeNode:
         """Convert dictionary data to KnowledgeNode object"""
-        insight_data = node_data.get('sensa_insight', {})
-        insight = SensaInsight(
+        insight_data: Dict[str, Any] = node_data.get('sensa_insight', {})
+        insight: Optional[SensaInsight] = SensaInsight(
             analogy=insight_data.get('analogy', 'Connect this to your experiences'),
             study_tip=insight_data.get('study_tip', 'Practice this concept regularly')
         ) if insight_data else None
         
-        children = None
+        children: Optional[List[KnowledgeNode]] = None
         if 'children' in node_data and node_data['children']:
             children = [self._convert_to_knowledge_node(child) for child in node_data['children']]
         
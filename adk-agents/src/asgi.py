@@ -0,0 +1,116 @@
+"""
+ASGI entry point for Sensa ADK Agents.
+
+Serves the same requests as the Cloud Functions handlers in main.py from one
+long-running process (e.g. on Cloud Run), so the orchestrator is awaited on
+the server's own event loop instead of being bridged from WSGI threads:
+
+    pip install -e .[asgi]
+    uvicorn src.asgi:app --workers 1 --http httptools --loop uvloop
+"""
+
+import logging
+from typing import Any
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from .common import dumps, get_orchestrator, parse_json_body
+from .config import config
+
+logger = logging.getLogger('sensa')
+
+class JSONResponse(ORJSONResponse):
+    """ORJSONResponse using the shared encoder options, so integer-keyed dicts serialize as in main.py"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+app = FastAPI(title="Sensa ADK Agents", default_response_class=JSONResponse)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=['*'],
+    allow_methods=['POST', 'GET', 'OPTIONS'],
+    allow_headers=['Content-Type', 'Authorization'],
+    max_age=3600
+)
+
+def _config_error() -> JSONResponse:
+    """Response for a deployment missing required environment variables"""
+    return JSONResponse({
+        'success': False,
+        'error': 'Server configuration error. Missing required environment variables.'
+    }, status_code=500)
+
+def _invalid_json(error: ValueError) -> JSONResponse:
+    """Response for a request body that is not a usable JSON object"""
+    return JSONResponse({
+        'success': False,
+        'error': f'Invalid JSON data: {str(error)}'
+    }, status_code=400)
+
+@app.post('/')
+async def sensa_agents_handler(request: Request):
+    """Main HTTP handler for Sensa ADK Agents"""
+    if not config.validate():
+        return _config_error()
+
+    try:
+        request_data = parse_json_body(await request.body())
+    except ValueError as e:
+        return _invalid_json(e)
+
+    try:
+        return await get_orchestrator().process(request_data)
+    except Exception as e:
+        logger.exception("Sensa Agents Error: %s", e)
+        return JSONResponse({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }, status_code=500)
+
+@app.post('/stream')
+async def sensa_agents_stream_handler(request: Request):
+    """Streaming course analysis (or scenario generation with action 'generate_scenarios') as Server-Sent Events"""
+    if not config.validate():
+        return _config_error()
+
+    try:
+        request_data = parse_json_body(await request.body())
+    except ValueError as e:
+        return _invalid_json(e)
+
+    if request_data.get('action') == 'generate_scenarios':
+        stages = get_orchestrator().stream_scenarios(
+            request_data.get('core_topics', []),
+            request_data.get('questionnaire_responses', {}),
+            request_data.get('num_scenarios', 5)
+        )
+    else:
+        user_id = request_data.get('user_id')
+        if not user_id:
+            return JSONResponse({
+                'success': False,
+                'error': 'user_id is required'
+            }, status_code=400)
+
+        stages = get_orchestrator().stream_course_analysis(
+            user_id, request_data.get('course_query'), request_data.get('course_id')
+        )
+
+    async def events():
+        async for event in stages:
+            data = dumps(event['data']).decode()
+            yield f"event: {event['stage']}\ndata: {data}\n\n"
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.get('/health')
+async def health_check():
+    """Health check endpoint"""
+    try:
+        return await get_orchestrator().health_check()
+    except Exception as e:
+        return JSONResponse({
+            'status': 'unhealthy',
+            'error': str(e)
+        }, status_code=500)
@@ -1,59 +1,135 @@
 import json
+import re
+import hashlib
 import asyncio
-from typing import Dict, Any, Optional
+import logging
+import random
+import weakref
+import orjson
+from typing import Dict, Any, Optional, cast
 from abc import ABC, abstractmethod
 import google.generativeai as genai
-from supabase import create_client, Client
+from google.api_core.exceptions import GoogleAPICallError
+from supabase import Client
+from .cache import response_cache, shared_cache
+from .clients import get_gemini_model, get_supabase_client
 from .config import config
 from .types import *
 
+logger = logging.getLogger('sensa')
+
+# Greedy match from the first '{' to the last '}' in a model response
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# One Gemini semaphore per event loop, since asyncio primitives bind to the loop that first uses them.
+# The entry points keep a single loop per process, so the limit covers all in-flight requests together.
+_gemini_semaphores: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = weakref.WeakKeyDictionary()
+
+# Rate limiting and overload responses worth retrying before callers fall back
+_RETRYABLE_GEMINI_CODES = {429, 503}
+
+def _gemini_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore bounding concurrent Gemini calls on the running loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _gemini_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _gemini_semaphores[loop] = asyncio.Semaphore(config.GEMINI_CONCURRENCY)
+    return semaphore
+
+def stable_course_id(prefix: str, text: str) -> str:
+    """Derive a course id from text that is the same in every process (unlike the salted built-in hash)"""
+    return f"{prefix}_{int(hashlib.blake2b(text.encode(), digest_size=4).hexdigest(), 16) % 100000}"
+
 class SensaBaseAgent(ABC):
     """Base class for all Sensa AI agents"""
     
+    gemini_model: genai.GenerativeModel
+    supabase: Client
+    
     def __init__(self, name: str):
         self.name = name
-        self.gemini_model = None
-        self.supabase: Optional[Client] = None
+        self.logger = logger
         self._initialize_services()
     
     def _initialize_services(self):
         """Initialize external services (Gemini and Supabase)"""
-        if not config.validate():
-            raise ValueError("Missing required configuration. Check your environment variables.")
-        
-        # Initialize Gemini
-        genai.configure(api_key=config.GOOGLE_AI_API_KEY)
-        self.gemini_model = genai.GenerativeModel(config.GEMINI_MODEL)
+        missing = config.missing_vars()
+        if missing:
+            raise ValueError(f"Missing required configuration: {', '.join(missing)}. Check your environment variables.")
         
-        # Initialize Supabase
-        self.supabase = create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
+        # Shared per-process clients; agents reuse the same model and HTTP transports
+        self.gemini_model = get_gemini_model()
+        self.supabase = get_supabase_client()
     
-    async def call_gemini(self, prompt: str, temperature: float = None, max_tokens: int = None) -> str:
-        """Make an async call to Gemini API"""
-        temp = temperature or config.DEFAULT_TEMPERATURE
+    async def call_gemini(self, prompt: str, temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+                          response_schema: Any = None, response_mime_type: Optional[str] = None,
+                          cache_ttl: Optional[float] = None, system_instruction: Optional[str] = None) -> str:
+        """Make an async call to Gemini API; a response_schema enables structured JSON output and a cache_ttl reuses identical responses"""
+        # 0.0 is a valid (deterministic) temperature, so only None falls back to the default
+        temp = temperature if temperature is not None else config.DEFAULT_TEMPERATURE
         max_tok = max_tokens or config.MAX_OUTPUT_TOKENS
+        if response_schema is not None and response_mime_type is None:
+            response_mime_type = 'application/json'
         
-        try:
-            response = await asyncio.to_thread(
-                self.gemini_model.generate_content,
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temp,
-                    max_output_tokens=max_tok,
-                )
+        cache_key = None
+        if cache_ttl:
+            cache_key = response_cache.make_key(
+                config.GEMINI_MODEL, system_instruction, prompt, temp, max_tok, response_mime_type, repr(response_schema)
             )
-            return response.text
-        except Exception as e:
-            raise Exception(f"Gemini API call failed: {str(e)}")
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            if shared_cache is not None:
+                cached = await asyncio.to_thread(shared_cache.get, cache_key)
+                if cached is not None:
+                    response_cache.set(cache_key, cached, cache_ttl)
+                    return cached
+        
+        # A static system instruction is sent as its own field so Gemini can reuse the cached prefix
+        model = get_gemini_model(system_instruction) if system_instruction else self.gemini_model
+        
+        generation_config = genai.types.GenerationConfig(
+            temperature=temp,
+            max_output_tokens=max_tok,
+            response_mime_type=response_mime_type,
+            response_schema=response_schema,
+        )
+        
+        for attempt in range(config.GEMINI_RETRIES + 1):
+            try:
+                # Bound in-flight calls so fan-out (memories, topics) stays under Gemini's rate limits
+                async with _gemini_semaphore():
+                    response = await asyncio.to_thread(model.generate_content, prompt, generation_config=generation_config)
+                text = response.text
+                break
+            except GoogleAPICallError as e:
+                if e.code not in _RETRYABLE_GEMINI_CODES or attempt == config.GEMINI_RETRIES:
+                    raise Exception(f"Gemini API call failed: {str(e)}")
+                # Exponential backoff with jitter, sleeping outside the semaphore so other calls can proceed
+                delay = config.GEMINI_RETRY_BASE_DELAY * 2 ** attempt + random.uniform(0, config.GEMINI_RETRY_BASE_DELAY)
+                self.log(f"Gemini returned {e.code}, retrying in {delay:.2f}s", "WARNING")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                raise Exception(f"Gemini API call failed: {str(e)}")
+        
+        if cache_key is not None:
+            response_cache.set(cache_key, text, cache_ttl)
+            if shared_cache is not None:
+                await asyncio.to_thread(shared_cache.set, cache_key, text, cache_ttl)
+        return text
     
     def extract_json_from_text(self, text: str) -> Dict[str, Any]:
         """Extract JSON from Gemini response text"""
         try:
             # Try to find JSON in the text
-            import re
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
+            json_match = _JSON_RE.search(text)
             if json_match:
-                return json.loads(json_match.group(0))
+                candidate = json_match.group(0)
+                try:
+                    return orjson.loads(candidate)
+                except orjson.JSONDecodeError:
+                    # stdlib json also accepts NaN/Infinity, which the model occasionally emits
+                    return json.loads(candidate)
             else:
                 raise ValueError("No JSON found in response")
         except Exception as e:
@@ -81,15 +157,19 @@ class SensaBaseAgent(ABC):
             response = self.supabase.table('courses').select('*').eq('id', course_id).execute()
             if not response.data:
                 raise ValueError(f"Course not found: {course_id}")
-            return response.data[0]
+            return cast(Dict[str, Any], response.data[0])
         except Exception as e:
             raise Exception(f"Failed to retrieve course data: {str(e)}")
     
+    async def probe(self) -> str:
+        """Report this agent's health; agents with real dependencies to check override this"""
+        return 'healthy'
+    
     @abstractmethod
     async def process(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Abstract method that each agent must implement"""
         pass
     
     def log(self, message: str, level: str = "INFO"):
-        """Simple logging method"""
-        print(f"[{level}] {self.name}: {message}") 
\ No newline at end of file
+        """Log a message tagged with the agent name; formatting is deferred until a handler emits it"""
+        logger.log(getattr(logging, level, logging.INFO), '%s: %s', self.name, message)
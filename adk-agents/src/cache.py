@@ -0,0 +1,87 @@
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from .config import config
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger('sensa')
+
+class ResponseCache:
+    """In-process TTL cache with LRU eviction for Gemini responses"""
+    
+    def __init__(self, max_items: int = 1024):
+        self.max_items = max_items
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a stable key from everything that determines a response"""
+        return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ttl seconds, evicting the least recently used entries when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+class RedisCache:
+    """Shared Redis-backed response cache, so every worker sees responses cached by the others"""
+    
+    def __init__(self, url: str, prefix: str = 'gem:'):
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None on a miss or when Redis is unreachable"""
+        try:
+            value = self._client.get(self.prefix + key)
+        except redis.RedisError as e:
+            logger.warning('Redis cache read failed: %s', e)
+            return None
+        return value.decode('utf-8') if value is not None else None
+    
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Store a value for ttl seconds; failures are logged and otherwise ignored"""
+        try:
+            self._client.set(self.prefix + key, value, ex=max(int(ttl), 1))
+        except redis.RedisError as e:
+            logger.warning('Redis cache write failed: %s', e)
+
+response_cache = ResponseCache(config.RESPONSE_CACHE_MAX_ITEMS)
+
+# Optional second tier shared across replicas; only enabled when REDIS_URL is set and redis is installed
+shared_cache: Optional[RedisCache] = None
+if config.REDIS_URL:
+    if REDIS_AVAILABLE:
+        shared_cache = RedisCache(config.REDIS_URL)
+    else:
+        logger.warning('REDIS_URL is set but the redis package is not installed; using the in-process cache only')
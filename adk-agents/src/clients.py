@@ -0,0 +1,20 @@
+from functools import lru_cache
+from typing import Optional
+import google.generativeai as genai
+from supabase import create_client, Client
+from .config import config
+
+# Shared external clients: every agent reuses one Gemini model and one Supabase
+# client per process instead of rebuilding transports in each constructor.
+
+# Bounded because scenario generation passes per-user profiles as system instructions
+@lru_cache(maxsize=128)
+def get_gemini_model(system_instruction: Optional[str] = None) -> genai.GenerativeModel:
+    """Return the shared Gemini model for a system instruction, configuring the SDK on first use"""
+    genai.configure(api_key=config.GOOGLE_AI_API_KEY)
+    return genai.GenerativeModel(config.GEMINI_MODEL, system_instruction=system_instruction)
+
+@lru_cache(maxsize=None)
+def get_supabase_client() -> Client:
+    """Return the shared Supabase client"""
+    return create_client(config.SUPABASE_URL, config.SUPABASE_ANON_KEY)
@@ -0,0 +1,40 @@
+"""
+Request helpers shared by the Cloud Functions (main.py) and ASGI (asgi.py) entry points.
+
+Kept free of Flask and FastAPI imports so either entry point can use them.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+import orjson
+from .agents import OrchestratorAgent
+
+# Non-string keys (e.g. ints) are stringified as json.dumps would
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+def dumps(obj: Any) -> bytes:
+    """Serialize a response body with orjson"""
+    return orjson.dumps(obj, option=JSON_OPTIONS)
+
+def parse_json_body(body: bytes) -> Dict[str, Any]:
+    """Parse a request body that must be a non-empty JSON object, raising ValueError otherwise"""
+    data = orjson.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    if not data:
+        raise ValueError("No JSON data provided")
+    return data
+
+# Initialize the orchestrator agent
+_orchestrator: Optional[OrchestratorAgent] = None
+_orchestrator_lock = threading.Lock()
+
+def get_orchestrator() -> OrchestratorAgent:
+    """Get or create the orchestrator agent"""
+    global _orchestrator
+    # Double-checked so concurrent first requests build only one orchestrator, without locking afterwards
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = OrchestratorAgent()
+    return _orchestrator
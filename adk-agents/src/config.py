@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import ClassVar, List, Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,15 +20,27 @@ class Config:
     
     # Model Configuration
     GEMINI_MODEL: str = 'gemini-2.5-flash'
+    # Instance-wide cap: main.py and asgi.py run every request on one event loop, so concurrent
+    # requests share these slots rather than each getting their own
+    GEMINI_CONCURRENCY: int = int(os.getenv('GEMINI_CONCURRENCY', '16'))
+    GEMINI_RETRIES: int = int(os.getenv('GEMINI_RETRIES', '2'))
+    GEMINI_RETRY_BASE_DELAY: float = float(os.getenv('GEMINI_RETRY_BASE_DELAY', '0.5'))
+    
+    # Response Cache Configuration
+    RESPONSE_CACHE_MAX_ITEMS: int = int(os.getenv('RESPONSE_CACHE_MAX_ITEMS', '1024'))
+    REDIS_URL: str = os.getenv('REDIS_URL', '')
+    
+    # Settings that must come from the environment
+    _REQUIRED: ClassVar[Tuple[str, ...]] = ('GOOGLE_AI_API_KEY', 'SUPABASE_URL', 'SUPABASE_ANON_KEY')
+    
+    @classmethod
+    def missing_vars(cls) -> List[str]:
+        """Names of required settings that are empty"""
+        return [name for name in cls._REQUIRED if not getattr(cls, name)]
     
     @classmethod
     def validate(cls) -> bool:
         """Validate that all required configuration is present"""
-        required_vars = [
-            cls.GOOGLE_AI_API_KEY,
-            cls.SUPABASE_URL,
-            cls.SUPABASE_ANON_KEY
-        ]
-        return all(var for var in required_vars)
+        return not cls.missing_vars()
 
 config = Config() 
\ No newline at end of file
@@ -1,20 +1,36 @@
-import json
+import os
 import asyncio
-from typing import Dict, Any
+import logging
+import threading
+from typing import Any
+import orjson
 from functions_framework import http
 import flask
-from .agents import OrchestratorAgent
+from .common import JSON_OPTIONS, dumps, get_orchestrator, parse_json_body
 from .config import config
 
-# Initialize the orchestrator agent
-orchestrator = None
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+logger = logging.getLogger('sensa')
 
-def get_orchestrator():
-    """Get or create the orchestrator agent"""
-    global orchestrator
-    if orchestrator is None:
-        orchestrator = OrchestratorAgent()
-    return orchestrator
+# One long-lived event loop on a daemon thread; handlers submit coroutines to it instead of building a loop per request
+_LOOP = asyncio.new_event_loop()
+threading.Thread(target=_LOOP.run_forever, name='sensa-event-loop', daemon=True).start()
+
+# Matches the Cloud Functions --timeout used by deploy.py
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', '540'))
+
+def run_async(coro, timeout: float = REQUEST_TIMEOUT):
+    """Run a coroutine on the shared event loop and block until it finishes"""
+    future = asyncio.run_coroutine_threadsafe(coro, _LOOP)
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+def _dumps(obj: Any) -> str:
+    """Serialize a response body to a JSON string"""
+    return dumps(obj).decode()
 
 def lambda_handler(event, context):
     """AWS Lambda handler for Sensa ADK Agents"""
@@ -23,7 +39,7 @@ def lambda_handler(event, context):
         # Extract body from Lambda event
         if 'body' in event:
             if isinstance(event['body'], str):
-                body = json.loads(event['body'])
+                body = orjson.loads(event['body'])
             else:
                 body = event['body']
         else:
@@ -37,7 +53,7 @@ def lambda_handler(event, context):
                     'Access-Control-Allow-Origin': '*',
                     'Content-Type': 'application/json'
                 },
-                'body': json.dumps({
+                'body': _dumps({
                     'error': 'Configuration validation failed. Please check environment variables.'
                 })
             }
@@ -45,13 +61,8 @@ def lambda_handler(event, context):
         # Get orchestrator and process request
         agent = get_orchestrator()
         
-        # Run async function in sync context
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            result = loop.run_until_complete(agent.process(body))
-        finally:
-            loop.close()
+        # Run async function on the shared event loop
+        result = run_async(agent.process(body))
         
         return {
             'statusCode': 200,
@@ -59,7 +70,7 @@ def lambda_handler(event, context):
                 'Access-Control-Allow-Origin': '*',
                 'Content-Type': 'application/json'
             },
-            'body': json.dumps(result)
+            'body': _dumps(result)
         }
         
     except Exception as e:
@@ -69,7 +80,7 @@ def lambda_handler(event, context):
                 'Access-Control-Allow-Origin': '*',
                 'Content-Type': 'application/json'
             },
-            'body': json.dumps({
+            'body': _dumps({
                 'error': str(e),
                 'type': type(e).__name__
             })
@@ -98,24 +109,22 @@ def sensa_agents_handler(request: flask.Request) -> flask.Response:
     try:
         # Validate configuration
         if not config.validate():
-            return json.dumps({
+            return _dumps({
                 'success': False,
                 'error': 'Server configuration error. Missing required environment variables.'
             }), 500, headers
         
         # Parse request data
         if request.method != 'POST':
-            return json.dumps({
+            return _dumps({
                 'success': False,
                 'error': 'Only POST requests are supported'
             }), 405, headers
         
         try:
-            request_data = request.get_json()
-            if not request_data:
-                raise ValueError("No JSON data provided")
-        except Exception as e:
-            return json.dumps({
+            request_data = parse_json_body(request.get_data())
+        except ValueError as e:
+            return _dumps({
                 'success': False,
                 'error': f'Invalid JSON data: {str(e)}'
             }), 400, headers
@@ -123,23 +132,110 @@ def sensa_agents_handler(request: flask.Request) -> flask.Response:
         # Get orchestrator and process request
         agent = get_orchestrator()
         
-        # Run the async process in the event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            result = loop.run_until_complete(agent.process(request_data))
-            return json.dumps(result), 200, headers
-        finally:
-            loop.close()
+        # Run the async process on the shared event loop
+        result = run_async(agent.process(request_data))
+        return _dumps(result), 200, headers
     
     except Exception as e:
-        print(f"Sensa Agents Error: {str(e)}")
-        return json.dumps({
+        logger.exception("Sensa Agents Error: %s", e)
+        return _dumps({
             'success': False,
             'error': f'Internal server error: {str(e)}'
         }), 500, headers
 
+def _iterate_async(async_iterator):
+    """Drive an async iterator from synchronous code on the shared event loop"""
+    try:
+        while True:
+            try:
+                yield run_async(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        run_async(async_iterator.aclose())
+
+@http
+def sensa_agents_stream_handler(request: flask.Request) -> flask.Response:
+    """Streaming course analysis (or scenario generation with action 'generate_scenarios'): each stage is sent as a Server-Sent Event as soon as it completes"""
+    
+    # Handle CORS preflight requests
+    if request.method == 'OPTIONS':
+        headers = {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'POST, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+            'Access-Control-Max-Age': '3600'
+        }
+        return ('', 204, headers)
+    
+    headers = {
+        'Access-Control-Allow-Origin': '*',
+        'Content-Type': 'application/json'
+    }
+    
+    if not config.validate():
+        return _dumps({
+            'success': False,
+            'error': 'Server configuration error. Missing required environment variables.'
+        }), 500, headers
+    
+    if request.method != 'POST':
+        return _dumps({
+            'success': False,
+            'error': 'Only POST requests are supported'
+        }), 405, headers
+    
+    try:
+        request_data = parse_json_body(request.get_data())
+    except ValueError as e:
+        return _dumps({
+            'success': False,
+            'error': f'Invalid JSON data: {str(e)}'
+        }), 400, headers
+    
+    user_id = request_data.get('user_id')
+    if request_data.get('action') != 'generate_scenarios' and not user_id:
+        return _dumps({
+            'success': False,
+            'error': 'user_id is required'
+        }), 400, headers
+    
+    try:
+        agent = get_orchestrator()
+    except ValueError as e:
+        # Agents refuse to start without their required configuration
+        logger.exception("Sensa Agents configuration error: %s", e)
+        return _dumps({
+            'success': False,
+            'error': 'Server configuration error. Missing required environment variables.'
+        }), 500, headers
+    except Exception as e:
+        logger.exception("Sensa Agents Error: %s", e)
+        return _dumps({
+            'success': False,
+            'error': f'Internal server error: {str(e)}'
+        }), 500, headers
+    
+    if request_data.get('action') == 'generate_scenarios':
+        stages = agent.stream_scenarios(
+            request_data.get('core_topics', []),
+            request_data.get('questionnaire_responses', {}),
+            request_data.get('num_scenarios', 5)
+        )
+    else:
+        stages = agent.stream_course_analysis(
+            user_id, request_data.get('course_query'), request_data.get('course_id')
+        )
+    
+    def events():
+        for event in _iterate_async(stages):
+            yield f"event: {event['stage']}\ndata: {_dumps(event['data'])}\n\n"
+    
+    return flask.Response(events(), status=200, mimetype='text/event-stream', headers={
+        'Access-Control-Allow-Origin': '*',
+        'Cache-Control': 'no-cache'
+    })
+
 # Health check endpoint
 @http
 def health_check(request: flask.Request) -> flask.Response:
@@ -151,18 +247,11 @@ def health_check(request: flask.Request) -> flask.Response:
     
     try:
         agent = get_orchestrator()
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            health_status = loop.run_until_complete(agent.health_check())
-            return json.dumps(health_status), 200, headers
-        finally:
-            loop.close()
+        health_status = run_async(agent.health_check())
+        return _dumps(health_status), 200, headers
     
     except Exception as e:
-        return json.dumps({
+        return _dumps({
             'status': 'unhealthy',
             'error': str(e)
         }), 500, headers
@@ -183,11 +272,10 @@ if __name__ == '__main__':
     try:
         agent = get_orchestrator()
         
-        loop = asyncio.get_event_loop()
-        result = loop.run_until_complete(agent.process(test_data))
+        result = run_async(agent.process(test_data))
         
         print("Test successful!")
-        print(json.dumps(result, indent=2))
+        print(orjson.dumps(result, option=orjson.OPT_INDENT_2 | JSON_OPTIONS).decode())
         
     except Exception as e:
         print(f"Test failed: {str(e)}")